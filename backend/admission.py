@@ -0,0 +1,58 @@
+import asyncio
+import os
+from backend import metrics
+from backend.executors import inference_workers
+
+# Gleichzeitige ML-Anfragen (Standard: Größe des Inferenz-Pools)
+max_concurrency = int(os.environ.get("ML_MAX_CONCURRENCY", str(inference_workers)))
+# Maximal wartende ML-Anfragen, darüber wird sofort regelbasiert geantwortet
+max_queue = int(os.environ.get("ML_MAX_QUEUE", "16"))
+# Maximale Wartezeit auf einen freien Platz in Sekunden
+max_wait = float(os.environ.get("ML_MAX_WAIT", "1.0"))
+
+
+class AdmissionLimiter:
+    """
+    Begrenzt die gleichzeitigen ML-Anfragen und die Warteschlange davor.
+    acquire() liefert False, wenn die Warteschlange voll ist oder die Wartezeit
+    abläuft. Der Aufrufer weicht dann auf die regelbasierte Erkennung aus.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.waiting = 0
+        self.active = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            admission_total.inc(result="queue_full")
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            admission_total.inc(result="timeout")
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        admission_total.inc(result="admitted")
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+
+admission_total = metrics.Counter("regexgen_ml_admission_total",
+                                  "ML detection admission decisions (admitted, queue_full, timeout)", ("result",))
+limiter = AdmissionLimiter(max_concurrency=max_concurrency, max_queue=max_queue, max_wait=max_wait)
+metrics.Gauge("regexgen_ml_queue_depth", "ML detection requests waiting for admission", function=lambda: limiter.waiting)
+metrics.Gauge("regexgen_ml_active", "ML detection requests currently running", function=lambda: limiter.active)
@@ -0,0 +1,54 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Regelbasierte Generierung/Erkennung und Matching
+cpu_workers = int(os.environ.get("CPU_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+# ML-Inferenz (eigener Pool, damit das Modell die regelbasierten Anfragen nicht blockiert)
+inference_workers = int(os.environ.get("INFERENCE_WORKERS", "1"))
+
+__cpu_pool: ThreadPoolExecutor | None = None
+__inference_pool: ThreadPoolExecutor | None = None
+__lock = threading.Lock()
+
+
+def cpu_pool() -> ThreadPoolExecutor:
+    global __cpu_pool
+    with __lock:
+        if __cpu_pool is None:
+            __cpu_pool = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="cpu")
+        return __cpu_pool
+
+
+def inference_pool() -> ThreadPoolExecutor:
+    global __inference_pool
+    with __lock:
+        if __inference_pool is None:
+            __inference_pool = ThreadPoolExecutor(max_workers=inference_workers, thread_name_prefix="inference")
+        return __inference_pool
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """Führt rechenintensive, regelbasierte Arbeit außerhalb des Event-Loops aus."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_inference(func: Callable, *args, **kwargs) -> Any:
+    """Führt ML-Inferenz im dedizierten Inferenz-Pool aus."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_pool(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown():
+    global __cpu_pool
+    global __inference_pool
+    with __lock:
+        for pool in (__cpu_pool, __inference_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        __cpu_pool = None
+        __inference_pool = None
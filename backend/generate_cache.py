@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from backend import logic, metrics
+from backend.enums.FileType import FileType as ft
+from backend.lru_cache import LRUCache
+
+enabled = str(os.environ.get("GENERATE_CACHE_ENABLED", "true")).lower() == "true"
+max_entries = int(os.environ.get("GENERATE_CACHE_ENTRIES", "1024"))
+max_bytes = int(os.environ.get("GENERATE_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Mit mehreren API-Prozessen: gemeinsames Verzeichnis, über das An/Aus und Leeren an alle Prozesse gehen
+shared_dir: str | None = None
+__control_name = "generate_cache.json"
+# Zuletzt übernommener Stand der Steuerdatei (mtime) und Anzahl der Leerungen
+__control_mtime: int | None = None
+__generation = 0
+
+
+def __regex_size(regex: str) -> int:
+    # GENERATE_CACHE_BYTES begrenzt Bytes, nicht Zeichen
+    return len(regex.encode("utf-8"))
+
+
+# Schlüssel: (Dateityp, SHA-256 des Textes), Wert: generierter Regex-String
+__cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=__regex_size)
+
+metrics.Counter("regexgen_generate_cache_hits_total", "/generate cache hits", function=lambda: __cache.hits)
+metrics.Counter("regexgen_generate_cache_misses_total", "/generate cache misses", function=lambda: __cache.misses)
+metrics.Counter("regexgen_generate_cache_evictions_total", "/generate cache evictions",
+                function=lambda: __cache.evictions)
+metrics.Gauge("regexgen_generate_cache_bytes", "Bytes held in the /generate cache",
+              function=lambda: __cache.stats()["bytes"])
+
+
+def generate_regex(filetype: ft, string: str) -> str:
+    """Wie logic.generate_regex, aber mit Cache für bereits gesehene Dokumente."""
+    __sync()
+    if not enabled or string is None:
+        return logic.generate_regex(filetype=filetype, string=string)
+
+    key = (filetype, hashlib.sha256(string.encode("utf-8")).hexdigest())
+    regex = __cache.get(key)
+    if regex is None:
+        regex = logic.generate_regex(filetype=filetype, string=string)
+        __cache.put(key, regex)
+    return regex
+
+
+def set_enabled(value: bool):
+    global enabled
+    __sync()
+    enabled = value
+    if not enabled:
+        flush()
+    else:
+        __publish()
+
+
+def flush():
+    global __generation
+    __sync()
+    __cache.clear()
+    __generation += 1
+    __publish()
+
+
+def stats() -> dict:
+    __sync()
+    # Die Zähler gelten pro API-Prozess (worker, None ohne prefork)
+    return {"enabled": enabled, "worker": metrics.worker} | __cache.stats()
+
+
+def __publish():
+    """Schreibt An/Aus und die Anzahl der Leerungen in die Steuerdatei (nur mit shared_dir)."""
+    global __control_mtime
+    if shared_dir is None:
+        return
+    path = Path(shared_dir) / __control_name
+    tmp = path.with_name(f"{__control_name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"enabled": enabled, "generation": __generation}), encoding="utf-8")
+    os.replace(tmp, path)
+    __control_mtime = path.stat().st_mtime_ns
+
+
+def __sync():
+    """Übernimmt Änderungen anderer Prozesse: ein os.stat pro Aufruf, gelesen wird nur bei neuer Steuerdatei."""
+    global enabled, __control_mtime, __generation
+    if shared_dir is None:
+        return
+    path = Path(shared_dir) / __control_name
+    try:
+        mtime = path.stat().st_mtime_ns
+        if mtime == __control_mtime:
+            return
+        control = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    __control_mtime = mtime
+    enabled = control["enabled"]
+    if control["generation"] != __generation or not enabled:
+        __cache.clear()
+    __generation = control["generation"]
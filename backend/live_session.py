@@ -0,0 +1,47 @@
+import re
+
+
+class LiveSession:
+    """
+    Zustand einer Live-Validierung: das kompilierte Pattern und der aktuelle Text.
+    Updates überschreiben sich gegenseitig, ausgewertet wird nur der jeweils letzte Stand.
+    """
+
+    def __init__(self):
+        self.pattern: re.Pattern[str] | None = None
+        self.text = ""
+        self.seq = 0
+        self._dirty = False
+
+    def set_pattern(self, pattern: re.Pattern[str]):
+        self.pattern = pattern
+        self._dirty = True
+
+    def apply(self, message: dict):
+        """Übernimmt ein Text-Update ("text" ersetzt den Text, "edit" ersetzt den Bereich start..end)."""
+        kind = message.get("type")
+        text = message.get("text")
+        if not isinstance(text, str):
+            raise ValueError("text must be a string")
+
+        if kind == "text":
+            self.text = text
+        elif kind == "edit":
+            start = message.get("start")
+            end = message.get("end", start)
+            if type(start) is not int or type(end) is not int or not 0 <= start <= end <= len(self.text):
+                raise ValueError(f"Invalid edit range {start}..{end} for text of length {len(self.text)}")
+            self.text = self.text[:start] + text + self.text[end:]
+        else:
+            raise ValueError(f"Unknown message type: {kind}")
+
+        seq = message.get("seq")
+        self.seq = seq if type(seq) is int else self.seq + 1
+        self._dirty = True
+
+    def take(self) -> tuple[re.Pattern[str], str, int] | None:
+        """Liefert den zu prüfenden Stand, falls sich seit der letzten Auswertung etwas geändert hat."""
+        if not self._dirty or self.pattern is None:
+            return None
+        self._dirty = False
+        return self.pattern, self.text, self.seq
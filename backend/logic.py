@@ -2,8 +2,9 @@ import csv
 import json
 import re
 from io import StringIO
+from typing import Callable
 from xml.etree import ElementTree as ET
-import ml.transformer as transformer
+from backend import ml_loader, metrics
 from backend.enums.FileType import FileType as ft
 from backend.regexgenerators import build_json_regex, build_xml_regex, build_html_regex, build_csv_regex
 
@@ -15,6 +16,27 @@ def match(pattern: re.Pattern[str], string: str) -> bool:
         return bool(pattern.fullmatch(string))
 
 
+def match_many(pattern: re.Pattern[str], strings: list, matcher: Callable = match) -> tuple[list, list]:
+    """
+    Matcht mehrere Strings gegen ein bereits kompiliertes Pattern.
+    Fehlerhafte Einträge liefern None und einen Eintrag in der Fehlerliste,
+    ohne den Rest des Batches abzubrechen.
+    """
+    results: list = []
+    errors: list = []
+    for index, string in enumerate(strings):
+        if not isinstance(string, str):
+            results.append(None)
+            errors.append({"index": index, "message": "Text is not a string"})
+            continue
+        try:
+            results.append(matcher(pattern, string))
+        except Exception as e:
+            results.append(None)
+            errors.append({"index": index, "message": str(e)})
+    return results, errors
+
+
 def generate_regex(filetype: ft, string: str) -> str:
     regex: re.Pattern[str]
     try:
@@ -22,30 +44,35 @@ def generate_regex(filetype: ft, string: str) -> str:
             raise Exception("Some of the provided values are null")
         match filetype:
             case ft.JSON:
-                regex = build_json_regex.json_pattern(string)
+                with metrics.stage_duration.time(stage="build_json_regex"):
+                    regex = build_json_regex.json_pattern(string)
             case ft.XML:
-                regex = build_xml_regex.xml_pattern(string)
+                with metrics.stage_duration.time(stage="build_xml_regex"):
+                    regex = build_xml_regex.xml_pattern(string)
             case ft.HTML:
-                regex = build_html_regex.html_pattern(string)
+                with metrics.stage_duration.time(stage="build_html_regex"):
+                    regex = build_html_regex.html_pattern(string)
             case ft.CSV:
-                regex = build_csv_regex.csv_pattern(string)
+                with metrics.stage_duration.time(stage="build_csv_regex"):
+                    regex = build_csv_regex.csv_pattern(string)
             case _:
                 raise Exception(f"Unsupported file type: {filetype}")
+        metrics.pattern_size.observe(len(regex.pattern), filetype=filetype.name)
         return str(regex.pattern)
     except Exception as e:
         raise e
 
 
-def detect_filetype(string: str, is_ml: bool) -> dict:
+def detect_filetype(string: str, is_ml: bool, model: str | None = None) -> dict:
     """
     Erkennt den Dateityp eines Strings anhand seines Inhalts.
-    Kann optional ML-Vorhersage verwenden.
+    Kann optional ML-Vorhersage verwenden (model: transformer oder ngram, Standard ML_MODEL).
     """
     filetype: type(ft) = ft.UNSUPPORTED
     probs: dict = {"JSON":0.0, "XML":0.0, "HTML":0.0, "CSV":0.0, "UNSUPPORTED":0.0}
 
     if is_ml:
-        probs = transformer.predict(string)
+        probs = ml_loader.predict(string, model=model)
         return probs
     else:
         data_string = string.strip()
@@ -67,6 +94,18 @@ def detect_filetype(string: str, is_ml: bool) -> dict:
         probs[filetype.name] = 1.0
         return probs
 
+
+def matching_filetypes(string: str) -> list:
+    """
+    Wertet alle Regeln aus (nicht nur bis zum ersten Treffer) und liefert die passenden Dateitypen.
+    Grundlage für den "auto"-Modus: nur bei genau einem Treffer ist das Regelergebnis eindeutig.
+    """
+    data_string = string.strip()
+    if not data_string:
+        return []
+    rules = ((ft.JSON, is_json), (ft.XML, is_xml), (ft.HTML, is_html), (ft.CSV, is_csv))
+    return [filetype for filetype, rule in rules if rule(data_string)]
+
 def is_json(data_string: str) -> bool:
     """Prüft, ob der String gültiges JSON ist."""
     if not data_string or not data_string.strip().startswith(('{', '[')):
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    Thread-sicherer LRU-Cache mit begrenzter Anzahl an Einträgen und optional
+    begrenzter Gesamtgröße (max_bytes, gemessen über sizeof) sowie Ablaufzeit (ttl in Sekunden).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int | None = None,
+                 sizeof: Callable[[Any], int] | None = None, ttl: float | None = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes requires a sizeof function")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            if self._data[key][2] is not None and self._data[key][2] <= time.monotonic():
+                # Abgelaufen: wie ein Fehlschlag behandeln und sofort entfernen
+                self._bytes -= self._data.pop(key)[1]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Einzelner Eintrag größer als der gesamte Cache: nicht aufnehmen
+                return
+            self._data[key] = (value, size, expires)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._bytes -= self._data.popitem(last=False)[1][1]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            expires = self._data[key][2]
+            return expires is None or expires > time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,234 @@
+import hashlib
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from backend import logic, metrics
+
+# inline: fullmatch im aufrufenden Thread, isolated: fullmatch in vorgestarteten Worker-Prozessen
+match_mode = str(os.environ.get("MATCH_MODE", "inline")).lower()
+match_timeout = float(os.environ.get("MATCH_TIMEOUT", "2.0"))
+match_workers = int(os.environ.get("MATCH_WORKERS", "2"))
+# Wartezeit auf einen freien Worker, zählt nicht zum Zeitbudget des Matches
+match_queue_timeout = float(os.environ.get("MATCH_QUEUE_TIMEOUT", str(match_timeout)))
+# Obergrenze für die Anzahl unterschiedlicher Patterns in der Timeout-Statistik
+max_tracked_patterns = 1000
+
+timeouts_total = metrics.Counter("regexgen_match_timeouts_total", "Matches aborted after exceeding MATCH_TIMEOUT")
+saturated_total = metrics.Counter("regexgen_match_pool_saturated_total",
+                                  "Matches rejected because no match worker became idle within MATCH_QUEUE_TIMEOUT")
+
+
+class MatchTimeoutError(TimeoutError):
+    """Das Matching hat das Zeitbudget überschritten."""
+
+
+class MatchPoolBusyError(RuntimeError):
+    """Alle Worker waren belegt, das Pattern selbst wurde nicht ausgeführt."""
+
+
+def _worker_loop(conn):
+    # Ein Auftrag ist ein Pattern mit einer Liste von Strings, das Ergebnis wird pro String zurückgeschickt
+    while True:
+        try:
+            pattern, strings = conn.recv()
+        except (EOFError, OSError):
+            return
+        for string in strings:
+            try:
+                conn.send((True, bool(pattern.fullmatch(string))))
+            except Exception as e:
+                conn.send((False, str(e)))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class MatchPool:
+    """
+    Pool vorgestarteter Prozesse für fullmatch mit Zeitbudget pro Anfrage.
+    Überschreitet ein Worker das Budget, wird er beendet und ersetzt.
+    """
+
+    def __init__(self, size: int, timeout: float, queue_timeout: float | None = None):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        start_methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("fork" if "fork" in start_methods else "spawn")
+        self._idle: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.size = size
+        self.timeout = timeout
+        self.queue_timeout = timeout if queue_timeout is None else queue_timeout
+        self.timeouts = 0
+        self.recycled = 0
+        self.saturated = 0
+        self.timeouts_by_pattern: Counter = Counter()
+        for _ in range(size):
+            self._idle.put(_Worker(self._ctx))
+
+    def fullmatch(self, pattern: re.Pattern[str], string: str) -> bool:
+        outcomes, failure = self.__run(pattern, [string])
+        if failure is not None:
+            raise failure
+        ok, value = outcomes[0]
+        if not ok:
+            raise ValueError(value)
+        return value
+
+    def fullmatch_many(self, pattern: re.Pattern[str], strings: list) -> tuple[list, list]:
+        """
+        Matcht alle Strings mit einem Aufruf an denselben Worker, das Zeitbudget gilt pro String.
+        Nach dem ersten Timeout werden die restlichen Strings nicht mehr ausgeführt und als Fehler gemeldet.
+        """
+        outcomes, failure = self.__run(pattern, strings)
+        results: list = []
+        errors: list = []
+        for index, (ok, value) in enumerate(outcomes):
+            results.append(value if ok else None)
+            if not ok:
+                errors.append({"index": index, "message": value})
+        for index in range(len(outcomes), len(strings)):
+            results.append(None)
+            message = str(failure) if index == len(outcomes) else "Skipped after an earlier match in the batch failed"
+            errors.append({"index": index, "message": message})
+        return results, errors
+
+    def __run(self, pattern: re.Pattern[str], strings: list) -> tuple[list, Exception | None]:
+        """Liefert (ok, Wert) für jeden fertigen String und ggf. den Fehler, der den Rest abgebrochen hat."""
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            saturated_total.inc()
+            with self._stats_lock:
+                self.saturated += 1
+            raise MatchPoolBusyError(f"No match worker available within {self.queue_timeout}s")
+
+        outcomes: list = []
+        failure = None
+        try:
+            worker.conn.send((pattern, strings))
+            # Das Budget beginnt erst, wenn ein Worker den Auftrag hat, und gilt für jeden String neu
+            for _ in strings:
+                if not worker.conn.poll(self.timeout):
+                    worker = self.__recycle(worker)
+                    self.__record_timeout(pattern)
+                    failure = MatchTimeoutError(f"Matching exceeded the time budget of {self.timeout}s")
+                    break
+                outcomes.append(worker.conn.recv())
+        except (EOFError, OSError):
+            worker = self.__recycle(worker)
+            failure = RuntimeError("Match worker died unexpectedly")
+        finally:
+            self._idle.put(worker)
+        return outcomes, failure
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "workers": self.size,
+                "timeout_seconds": self.timeout,
+                "timeouts": self.timeouts,
+                "recycled_workers": self.recycled,
+                "saturated": self.saturated,
+                "timeouts_by_pattern": dict(self.timeouts_by_pattern.most_common(20)),
+            }
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+    def __recycle(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._stats_lock:
+            self.recycled += 1
+        return _Worker(self._ctx)
+
+    def __record_timeout(self, pattern: re.Pattern[str]):
+        pid = hashlib.sha256(pattern.pattern.encode("utf-8")).hexdigest()
+        timeouts_total.inc()
+        with self._stats_lock:
+            self.timeouts += 1
+            if pid in self.timeouts_by_pattern or len(self.timeouts_by_pattern) < max_tracked_patterns:
+                self.timeouts_by_pattern[pid] += 1
+
+
+__pool: MatchPool | None = None
+__lock = threading.Lock()
+
+
+def start() -> MatchPool:
+    """Startet den Worker-Pool vorab (z.B. beim Hochfahren der API)."""
+    global __pool
+    with __lock:
+        if __pool is None:
+            __pool = MatchPool(size=match_workers, timeout=match_timeout, queue_timeout=match_queue_timeout)
+        return __pool
+
+
+def match(pattern: re.Pattern[str], string: str) -> bool:
+    """Wie logic.match, im Modus "isolated" aber zeitbegrenzt in einem Worker-Prozess."""
+    with metrics.stage_duration.time(stage="fullmatch"):
+        if match_mode != "isolated":
+            return logic.match(pattern, string)
+        if string is None or len(string) == 0 or pattern is None:
+            return False
+        return start().fullmatch(pattern, string)
+
+
+def match_many(pattern: re.Pattern[str], strings: list) -> tuple[list, list]:
+    """Wie logic.match_many, im Modus "isolated" aber mit einem einzigen Auftrag an einen Worker für den ganzen Batch."""
+    if match_mode != "isolated":
+        return logic.match_many(pattern, strings, matcher=match)
+    results: list = [None] * len(strings)
+    errors: list = []
+    pending = []
+    for index, string in enumerate(strings):
+        if not isinstance(string, str):
+            errors.append({"index": index, "message": "Text is not a string"})
+        elif len(string) == 0:
+            results[index] = False
+        else:
+            pending.append(index)
+    if pending:
+        with metrics.stage_duration.time(stage="fullmatch"):
+            values, pool_errors = start().fullmatch_many(pattern, [strings[i] for i in pending])
+        for position, value in enumerate(values):
+            results[pending[position]] = value
+        errors.extend({"index": pending[error["index"]], "message": error["message"]} for error in pool_errors)
+        errors.sort(key=lambda error: error["index"])
+    return results, errors
+
+
+def stats() -> dict:
+    """Statistik des Pools dieses API-Prozesses (worker, None ohne prefork)."""
+    with __lock:
+        pool = __pool
+    if pool is None:
+        return {"mode": match_mode, "worker": metrics.worker, "workers": 0, "timeout_seconds": match_timeout, "timeouts": 0,
+                "recycled_workers": 0, "saturated": 0, "timeouts_by_pattern": {}}
+    return {"mode": match_mode, "worker": metrics.worker} | pool.stats()
+
+
+def shutdown():
+    global __pool
+    with __lock:
+        if __pool is not None:
+            __pool.close()
+        __pool = None
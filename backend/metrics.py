@@ -0,0 +1,231 @@
+import bisect
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, Sequence
+
+latency_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+size_buckets = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_registry: list = []
+# Mit mehreren API-Prozessen (prefork): Nummer des Prozesses als Label "worker" und Verzeichnis,
+# in dem jeder Prozess seine Werte ablegt, damit /metrics in jedem Prozess die Summe aller liefert
+worker: str | None = None
+shared_dir: str | None = None
+publish_interval = float(os.environ.get("METRICS_PUBLISH_SECONDS", "5"))
+
+
+def __escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{__escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if worker is not None:
+        parts.append(f'worker="{__escape(worker)}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+    def family(self) -> dict:
+        return {"name": self.name, "help": self.documentation, "type": self.kind, "samples": self._samples()}
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """Die Zeilen der Messwerte im Prometheus-Textformat (ohne HELP/TYPE)."""
+
+
+class Counter(_Metric):
+    """Counter, der explizit hochgezählt oder beim Export über eine Funktion abgefragt wird."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Callable[[], float] | None = None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+        self._values: dict = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        if self._function is not None:
+            return [f"{self.name}{_format_labels((), ())} {_format_value(self._function())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Gauge, deren Wert beim Export über eine Funktion abgefragt oder explizit gesetzt wird."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Callable[[], float] | None = None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+        self._values: dict = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> list[str]:
+        if self._function is not None:
+            return [f"{self.name}{_format_labels((), ())} {_format_value(self._function())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = latency_buckets):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Misst die Dauer des with-Blocks in Sekunden."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """Alle Metriken im Prometheus-Textformat (mit shared_dir die aller API-Prozesse)."""
+    if shared_dir is not None:
+        return render_shared()
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def publish():
+    """Legt die eigenen Werte als Snapshot in shared_dir ab (ersetzt den vorherigen Snapshot dieses Prozesses)."""
+    path = Path(shared_dir) / f"metrics-{worker}.json"
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps([metric.family() for metric in list(_registry)]), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def render_shared() -> str:
+    """Führt die Snapshots aller Prozesse zusammen, HELP und TYPE stehen pro Metrik nur einmal."""
+    publish()
+    families: dict = {}
+    for path in sorted(Path(shared_dir).glob("metrics-*.json")):
+        try:
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for family in snapshot:
+            merged = families.setdefault(family["name"], family | {"samples": []})
+            merged["samples"].extend(family["samples"])
+    lines = []
+    for family in families.values():
+        lines.append(f"# HELP {family['name']} {family['help']}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        lines.extend(family["samples"])
+    return "\n".join(lines) + "\n"
+
+
+def start_publishing():
+    """Veröffentlicht die Werte regelmäßig, damit /metrics in den anderen Prozessen aktuell bleibt."""
+    if shared_dir is None:
+        return
+
+    def loop():
+        while True:
+            try:
+                publish()
+            except OSError as e:
+                print(f"Publishing metrics failed: {e}")
+            time.sleep(publish_interval)
+
+    threading.Thread(target=loop, name="metrics-publisher", daemon=True).start()
+
+
+# Metriken der API ##########################################
+http_requests = Counter("regexgen_http_requests_total", "HTTP requests by route, method and status",
+                        ("route", "method", "status"))
+http_errors = Counter("regexgen_http_errors_total", "HTTP requests answered with status >= 400 or an exception",
+                      ("route", "method"))
+http_duration = Histogram("regexgen_http_request_duration_seconds", "HTTP request latency by route", ("route",))
+stage_duration = Histogram("regexgen_stage_duration_seconds",
+                           "Latency of internal processing stages (json_parse, filetype_resolve, build_*_regex, "
+                           "re_compile, fullmatch, tokenize, model_forward)", ("stage",))
+pattern_size = Histogram("regexgen_generated_pattern_bytes", "Size of generated regex patterns by file type",
+                         ("filetype",), buckets=size_buckets)
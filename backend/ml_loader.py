@@ -0,0 +1,229 @@
+import importlib
+import math
+import os
+import statistics
+import threading
+import time
+from types import ModuleType
+
+# Lädt den ML-Stack (torch, transformers, ...) bereits beim Start (im Hintergrund) statt bei der ersten ML-Anfrage
+preload = str(os.environ.get("ML_PRELOAD", "false")).lower() == "true"
+# Standard-Modell für ML-Anfragen: transformer (DistilBERT) oder ngram (NumPy, ohne torch)
+models = ("transformer", "ngram")
+default_model = str(os.environ.get("ML_MODEL", "transformer")).lower()
+if default_model not in models:
+    raise ValueError(f"ML_MODEL must be one of {models}")
+# Warm-up beim Start (pro Worker, bevor Anfragen angenommen werden): Tokenlängen x Batchgrößen, je ML_WARMUP_ROUNDS Durchläufe
+warmup_enabled = str(os.environ.get("ML_WARMUP", str(preload))).lower() == "true"
+warmup_lengths = [int(x) for x in os.environ.get("ML_WARMUP_LENGTHS", "64,128,256,512").split(",")]
+warmup_batch_sizes = [int(x) for x in os.environ.get("ML_WARMUP_BATCH_SIZES", "1,4").split(",")]
+warmup_rounds = max(2, int(os.environ.get("ML_WARMUP_ROUNDS", "3")))
+# Verhalten von ML-Anfragen, solange das Modell nicht bereit ist: fallback (regelbasiert) oder reject (503)
+not_ready_mode = str(os.environ.get("ML_NOT_READY", "fallback")).lower()
+# Wartezeit bis zum erneuten Laden nach einem Fehler und Höchstzahl der Wiederholungen (0 = failed ist endgültig)
+load_retry_seconds = float(os.environ.get("ML_LOAD_RETRY_SECONDS", "30"))
+load_retries = int(os.environ.get("ML_LOAD_RETRIES", "3"))
+
+# Zustand pro Modell: not_loaded, loading, ready, failed
+__states = {name: "not_loaded" for name in models}
+__errors: dict = {name: None for name in models}
+# Zeitpunkt (monotonic) des nächsten Ladeversuchs nach einem Fehler, None = kein weiterer Versuch
+__retry_at: dict = {name: None for name in models}
+__state_lock = threading.Lock()
+
+__transformer: ModuleType | None = None
+__ngram: ModuleType | None = None
+__lock = threading.Lock()
+# Eigene Sperre pro Modell: das n-Gramm-Modell wartet nicht, während DistilBERT geladen wird
+__transformer_lock = threading.Lock()
+__ngram_lock = threading.Lock()
+__first_request_done = False
+
+
+class ModelUnavailableError(RuntimeError):
+    """Das Modell lässt sich ohne Eingriff nicht laden (z.B. Offline-Modus ohne lokales Modell), kein erneuter Versuch."""
+
+__timings = {
+    "import_seconds": None,
+    "model_load_seconds": None,
+    "first_request_seconds": None,
+    "ngram_load_seconds": None,
+    "warmup": None,
+}
+
+
+def get_transformer() -> ModuleType:
+    """Importiert ml.transformer beim ersten Aufruf und bereitet das Modell vor."""
+    global __transformer
+    if __transformer is not None:
+        return __transformer
+    with __transformer_lock:
+        if __transformer is None:
+            start = time.perf_counter()
+            module = importlib.import_module("ml.transformer")
+            __timings["import_seconds"] = round(time.perf_counter() - start, 4)
+
+            start = time.perf_counter()
+            # Der Server trainiert nie selbst, fehlt ein Modell, schlägt das Laden endgültig fehl
+            module.prepare_model(allow_training=False)
+            __timings["model_load_seconds"] = round(time.perf_counter() - start, 4)
+            print(f"ML stack ready: {__timings}")
+            __transformer = module
+    return __transformer
+
+
+def get_ngram() -> ModuleType:
+    """Importiert ml.ngram_classifier beim ersten Aufruf und lädt die Gewichte (ohne torch)."""
+    global __ngram
+    if __ngram is not None:
+        return __ngram
+    with __ngram_lock:
+        if __ngram is None:
+            start = time.perf_counter()
+            module = importlib.import_module("ml.ngram_classifier")
+            module.load()
+            __timings["ngram_load_seconds"] = round(time.perf_counter() - start, 4)
+            __ngram = module
+    return __ngram
+
+
+def get_default() -> ModuleType:
+    return get_ngram() if default_model == "ngram" else get_transformer()
+
+
+def state(model: str | None = None) -> str:
+    return __states[model or default_model]
+
+
+def ensure_loading(model: str | None = None) -> str:
+    """Startet das Laden (und ggf. Warm-up) im Hintergrund, falls noch nicht geschehen, und liefert den Zustand."""
+    model = model or default_model
+    with __state_lock:
+        if __states[model] == "not_loaded":
+            __states[model] = "loading"
+            threading.Thread(target=__load, args=(model,), name=f"load-{model}", daemon=True).start()
+        return __states[model]
+
+
+def defer_to_master():
+    """
+    Im Worker (prefork), solange der Master das Standard-Modell lädt: Zustand loading, ohne selbst zu laden.
+    Der Master ersetzt die Worker anschließend durch neue, die das geladene Modell übernehmen.
+    """
+    with __state_lock:
+        __states[default_model] = "loading"
+
+
+def __load(model: str):
+    # Nach einem Fehler wird höchstens load_retries-mal nach load_retry_seconds erneut geladen,
+    # außer bei fehlenden Paketen oder ModelUnavailableError
+    attempt = 0
+    while True:
+        attempt += 1
+        retry = False
+        try:
+            get_ngram() if model == "ngram" else get_transformer()
+            if warmup_enabled and model == default_model:
+                warmup()
+            new_state, error = "ready", None
+        except Exception as e:
+            final = isinstance(e, (ImportError, ModelUnavailableError))
+            retry = load_retry_seconds > 0 and attempt <= load_retries and not final
+            print(f"Loading model {model} failed: {e}" + (f", retrying in {load_retry_seconds}s" if retry else ""))
+            new_state, error = "failed", str(e)
+        with __state_lock:
+            __states[model] = new_state
+            __errors[model] = error
+            __retry_at[model] = time.monotonic() + load_retry_seconds if retry else None
+        if not retry:
+            return
+        time.sleep(load_retry_seconds)
+        with __state_lock:
+            __states[model] = "loading"
+
+
+def retry_after(model: str | None = None) -> int | None:
+    """Sekunden bis zu einem sinnvollen neuen Versuch (für Retry-After), None, wenn das Laden endgültig fehlgeschlagen ist."""
+    model = model or default_model
+    with __state_lock:
+        if __states[model] != "failed":
+            return 5
+        if __retry_at[model] is None:
+            return None
+        return max(1, math.ceil(__retry_at[model] - time.monotonic()))
+
+
+def is_ready() -> bool:
+    """
+    Mit ML_PRELOAD bzw. ML_WARMUP bereit, sobald das Standard-Modell geladen (und aufgewärmt) ist.
+    Sonst immer bereit: ein Laden bei Bedarf, auch ein fehlgeschlagenes, steht nur in states(),
+    Regeln, /match und /generate funktionieren auch ohne Modell.
+    """
+    if not (preload or warmup_enabled):
+        return True
+    return state() == "ready"
+
+
+def states() -> dict:
+    with __state_lock:
+        return {name: {"state": __states[name], "error": __errors[name]} for name in models}
+
+
+def warmup() -> dict:
+    """
+    Wärmt das Standard-Modell mit Beispielen aus den synth_datasets-Generatoren auf.
+    Pro Tokenlänge und Batchgröße wird der erste (kalte) und der Median der weiteren (warmen) Durchläufe festgehalten.
+    """
+    module = get_default()
+    start = time.perf_counter()
+    runs = []
+    for inputs, run in module.warmup_inputs(__warmup_texts(), warmup_lengths, warmup_batch_sizes):
+        durations = []
+        for _ in range(warmup_rounds):
+            run_start = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - run_start)
+        runs.append(inputs | {"cold_ms": round(durations[0] * 1000, 2),
+                              "warm_ms": round(statistics.median(durations[1:]) * 1000, 2)})
+    report = {"model": default_model, "seconds": round(time.perf_counter() - start, 4), "runs": runs}
+    __timings["warmup"] = report
+    print(f"Warm-up done in {report['seconds']}s: {runs}")
+    return report
+
+
+def __warmup_texts() -> list:
+    import json
+    from synth_datasets import csvgenerator, htmlgenerator, xmlgenerator, jsongenerator
+    return [
+        json.dumps(jsongenerator.generate_nested_json(max_depth=3)),
+        xmlgenerator.generate_nested_xml(max_depth=3),
+        csvgenerator.generate_csv_example(),
+        htmlgenerator.generate_nested_html("html", max_depth=3),
+    ]
+
+
+def is_loaded() -> bool:
+    return __transformer is not None
+
+
+def predict(text: str, model: str | None = None) -> dict:
+    """Vorhersage mit dem gewählten Modell (Standard: ML_MODEL). Lädt es bei Bedarf nach."""
+    global __first_request_done
+    if (model or default_model) == "ngram":
+        return get_ngram().predict(text)
+    if __first_request_done:
+        return get_transformer().predict(text)
+
+    start = time.perf_counter()
+    probs = get_transformer().predict(text)
+    with __lock:
+        if not __first_request_done:
+            __first_request_done = True
+            __timings["first_request_seconds"] = round(time.perf_counter() - start, 4)
+    return probs
+
+
+def timings() -> dict:
+    """Startzeiten des ML-Stacks: Import, Laden des Modells und erste Anfrage (None = noch nicht erfolgt)."""
+    return {"preload": preload, "default_model": default_model, "loaded": is_loaded(),
+            "ngram_loaded": __ngram is not None, "models": states()} | __timings
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+from backend import metrics
+from backend.lru_cache import LRUCache
+
+registry_size = int(os.environ.get("PATTERN_REGISTRY_SIZE", "1024"))
+# Gemeinsamer Ablageort (eine Datei pro ID), damit IDs in allen API-Prozessen gültig sind.
+# Mit WORKERS > 1 setzt start_api ein temporäres Verzeichnis, falls hier nichts angegeben ist
+store_dir = os.environ.get("PATTERN_STORE_DIR")
+# Höchstzahl der Dateien im Ablageort, die am längsten nicht benutzten werden gelöscht
+store_size = int(os.environ.get("PATTERN_STORE_SIZE", str(registry_size)))
+__registry = LRUCache(max_entries=registry_size)
+__id_format = re.compile(r"[0-9a-f]{64}")
+metrics.Gauge("regexgen_pattern_registry_entries", "Compiled patterns held in the pattern registry",
+              function=lambda: len(__registry))
+
+
+def pattern_id(regex: str) -> str:
+    """Stabile ID eines Patterns: SHA-256 über den Regex-Text."""
+    return hashlib.sha256(regex.encode("utf-8")).hexdigest()
+
+
+def register(regex: str) -> str:
+    """Kompiliert das Regex einmalig, legt es in der Registry (und ggf. im gemeinsamen Ablageort) ab und gibt die ID zurück."""
+    pid = pattern_id(regex)
+    if __registry.get(pid) is None:
+        with metrics.stage_duration.time(stage="re_compile"):
+            pattern = re.compile(regex)
+        __registry.put(pid, pattern)
+    if store_dir is not None:
+        __store(pid, regex)
+    return pid
+
+
+def get(pid: str) -> re.Pattern[str] | None:
+    """Liefert das kompilierte Pattern zur ID oder None, falls unbekannt bzw. verdrängt."""
+    pattern = __registry.get(pid)
+    if pattern is None and store_dir is not None:
+        pattern = __load(pid)
+    return pattern
+
+
+def stats() -> dict:
+    return __registry.stats()
+
+
+def __store(pid: str, regex: str):
+    path = Path(store_dir) / f"{pid}.re"
+    if path.is_file():
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            # Zwischen Prüfung und utime von __prune gelöscht, neu schreiben
+            pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Erst vollständig schreiben, dann umbenennen: andere Prozesse sehen nie eine halbe Datei
+    tmp = path.with_name(f"{pid}.{os.getpid()}.tmp")
+    tmp.write_text(regex, encoding="utf-8")
+    os.replace(tmp, path)
+    __prune()
+
+
+def __prune():
+    """Begrenzt den Ablageort auf store_size Dateien (Reihenfolge nach letzter Benutzung, s. __load)."""
+    files = []
+    for file in Path(store_dir).glob("*.re"):
+        try:
+            files.append((file.stat().st_mtime, file))
+        except FileNotFoundError:
+            # Bereits von einem anderen Prozess gelöscht
+            continue
+    if len(files) <= store_size:
+        return
+    files.sort()
+    for _, file in files[:len(files) - store_size]:
+        file.unlink(missing_ok=True)
+
+
+def __load(pid: str) -> re.Pattern[str] | None:
+    # Nur echte IDs als Dateinamen zulassen (kein Pfad aus der Anfrage)
+    if not isinstance(pid, str) or not __id_format.fullmatch(pid):
+        return None
+    path = Path(store_dir) / f"{pid}.re"
+    try:
+        regex = path.read_text(encoding="utf-8")
+        # Benutzung vermerken, damit __prune zuerst ungenutzte Patterns löscht
+        os.utime(path)
+    except OSError:
+        return None
+    if pattern_id(regex) != pid:
+        return None
+    with metrics.stage_duration.time(stage="re_compile"):
+        pattern = re.compile(regex)
+    __registry.put(pid, pattern)
+    return pattern
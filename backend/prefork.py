@@ -0,0 +1,116 @@
+import gc
+import os
+import signal
+import socket
+import sys
+from typing import Callable
+import uvicorn
+from backend import metrics
+
+# Threads für torch pro Worker (Standard: CPUs / Worker), damit sich die Worker nicht gegenseitig ausbremsen
+torch_threads = os.environ.get("TORCH_THREADS")
+
+
+def serve(app, host: str, port: int, workers: int, preload: Callable | None = None,
+          defer_loading: Callable | None = None):
+    """
+    Startet mehrere uvicorn-Worker per fork auf einem gemeinsamen Socket. Abgestürzte Worker werden neu gestartet.
+    Mit preload werden die Worker zuerst gestartet (sie beantworten Regeln und Health-Endpunkte, defer_loading
+    wird in ihnen aufgerufen), währenddessen lädt der Master das Modell. Danach ersetzt er die Worker durch neue,
+    die die Gewichte per Copy-on-Write mit ihm teilen.
+    """
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    threads = int(torch_threads) if torch_threads else max(1, (os.cpu_count() or 1) // workers)
+    children: dict[int, int] = {}
+    stopping = False
+    loading = preload is not None
+
+    def stop(signum, _):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+        if loading:
+            # Das Laden im Master nicht erst abwarten
+            raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Objekte des Masters aus der GC-Verwaltung nehmen, damit GC-Läufe keine geteilten Seiten kopieren
+    gc.freeze()
+    for index in range(workers):
+        children[__fork_worker(app, sock, index, threads, defer_loading if loading else None)] = index
+    print(f"Started {workers} workers with {threads} torch threads each")
+
+    if preload is not None:
+        # Synchron im Haupt-Thread: ein fork während ein Lade-Thread läuft, wäre nicht sicher.
+        # Abgestürzte Worker werden daher erst nach dem Laden neu gestartet
+        try:
+            preload()
+        except Exception as e:
+            print(f"Loading in the master failed, workers will load on their own: {e}")
+        loading = False
+        gc.freeze()
+        for pid, index in list(children.items()):
+            if stopping:
+                break
+            # Erst den neuen Worker starten, dann den alten beenden (er beantwortet laufende Anfragen noch)
+            children[__fork_worker(app, sock, index, threads, None)] = index
+            del children[pid]
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        print(f"Replaced {workers} workers after loading in the master")
+
+    while children:
+        try:
+            pid, exit_status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        # Ersetzte Worker sind nicht mehr in children und werden nicht neu gestartet
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"Worker {index} (pid {pid}) exited with status {exit_status}, restarting")
+        children[__fork_worker(app, sock, index, threads, None)] = index
+
+    sock.close()
+
+
+def __fork_worker(app, sock: socket.socket, index: int, threads: int, on_start: Callable | None) -> int:
+    pid = os.fork()
+    if pid != 0:
+        return pid
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Label für /metrics, bleibt beim Neustart eines Workers gleich
+    metrics.worker = str(index)
+    # Gilt auch, falls torch erst später im Worker importiert wird
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    if on_start is not None:
+        on_start()
+
+    exit_code = 0
+    try:
+        server = uvicorn.Server(uvicorn.Config(app))
+        server.run(sockets=[sock])
+    except BaseException as e:
+        print(f"Worker {index} failed: {e}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
@@ -1,14 +1,32 @@
 import re
 import os
-import ml.transformer
-from backend import logic
-from fastapi import FastAPI, status, Request
-from fastapi.responses import JSONResponse
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from backend import logic, pattern_registry, executors, match_pool, ml_loader, metrics, generate_cache, prefork, admission
+from backend.live_session import LiveSession
+from fastapi import FastAPI, status, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from backend.enums.FileType import FileType
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if match_pool.match_mode == "isolated":
+        match_pool.start()
+    metrics.start_publishing()
+    if ml_loader.preload or ml_loader.warmup_enabled:
+        # Laden und Warm-up laufen pro Worker im Hintergrund, der Server nimmt sofort Anfragen an
+        ml_loader.ensure_loading()
+    yield
+    executors.shutdown()
+    match_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 origins = [
     "http://localhost:4200",
     "https://www.regexify.eu/home",
@@ -25,92 +43,400 @@ app.add_middleware(
 
 url = str(os.environ.get("URL", "0.0.0.0"))
 port = int(os.environ.get("PORT", "8000"))
+workers = int(os.environ.get("WORKERS", "1"))
 api_endpoint = str(os.environ.get("ENDPOINT", "/v1/api/endpoint"))
+ws_debounce = float(os.environ.get("WS_DEBOUNCE_MS", "50")) / 1000
+
+auto_total = metrics.Counter("regexgen_detect_auto_total",
+                             "Engine chosen by /detectfiletype in auto mode (rules, ml)", ("engine",))
+
+@app.middleware("http")
+async def collect_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        metrics.http_duration.observe(time.perf_counter() - start, route=route_path)
+        metrics.http_requests.inc(route=route_path, method=request.method, status=status_code)
+        if status_code >= 400:
+            metrics.http_errors.inc(route=route_path, method=request.method)
+
+
+async def __read_json(request: Request):
+    body = await request.body()
+    with metrics.stage_duration.time(stage="json_parse"):
+        return json.loads(body)
+
+
+def __compile(regex: str) -> re.Pattern[str]:
+    with metrics.stage_duration.time(stage="re_compile"):
+        return re.compile(regex)
+
 
 @app.get(api_endpoint)
 async def root():
     return {"message": "Python API läuft"}
 
+@app.get(api_endpoint + "/metrics")
+async def export_metrics() -> PlainTextResponse:
+    return PlainTextResponse(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post(api_endpoint + "/match")
 async def match(request: Request) -> JSONResponse:
-    request_body = await request.json()
+    request_body = await __read_json(request)
     string = request_body.get("text")
     regex = request_body.get("regex")
-    if regex is None or len(regex) == 0:
-        regex_pattern = None
-    else:
-        regex_pattern = re.compile(regex)
-
+    pattern_id = request_body.get("id")
     result_obj = {"value": False, "message": ""}
 
+    if regex is not None and len(regex) > 0:
+        regex_pattern = await executors.run_cpu(__compile, regex)
+    elif pattern_id is not None:
+        regex_pattern = await executors.run_cpu(pattern_registry.get, str(pattern_id))
+        if regex_pattern is None:
+            result_obj["message"] = "Error. Unknown pattern id"
+            return JSONResponse(content=result_obj, status_code=status.HTTP_404_NOT_FOUND)
+    else:
+        regex_pattern = None
+
     if regex_pattern is None or string is None or len(string) == 0:
         result_obj["message"] = "Error. Either the regex or the text was null"
         return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
 
-    result_obj["value"] = logic.match(regex_pattern, string)
+    try:
+        result_obj["value"] = await executors.run_cpu(match_pool.match, regex_pattern, string)
+    except match_pool.MatchTimeoutError as e:
+        result_obj["timeout"] = True
+        result_obj["message"] = f"Error. Message: {str(e)}"
+        return JSONResponse(content=result_obj, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except match_pool.MatchPoolBusyError as e:
+        result_obj["message"] = f"Error. Message: {str(e)}"
+        return JSONResponse(content=result_obj, status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={"Retry-After": "1"})
     result_obj["message"] = "Successfully matched the pattern"
     return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
 
 
+@app.get(api_endpoint + "/match/stats")
+async def match_stats() -> JSONResponse:
+    result_obj = {"value": match_pool.stats(), "message": "Successfully collected match statistics"}
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
+
+@app.post(api_endpoint + "/match/batch")
+async def match_batch(request: Request) -> JSONResponse:
+    request_body = await __read_json(request)
+    regex = request_body.get("regex")
+    pattern_id = request_body.get("id")
+    texts = request_body.get("texts")
+    patterns = request_body.get("patterns")
+    result_obj = {"value": None, "errors": None, "message": ""}
+
+    single = regex is not None or pattern_id is not None or texts is not None
+    if single == (patterns is not None):
+        result_obj["message"] = "Error. Provide either regex (or id) and texts or patterns"
+        return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if single:
+            if not isinstance(texts, list):
+                result_obj["message"] = "Error. Texts must be a list"
+                return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
+            if isinstance(regex, str) and len(regex) > 0:
+                result_obj["value"], result_obj["errors"] = await executors.run_cpu(__match_texts, regex, texts)
+            elif pattern_id is not None:
+                regex_pattern = await executors.run_cpu(pattern_registry.get, str(pattern_id))
+                if regex_pattern is None:
+                    result_obj["message"] = "Error. Unknown pattern id"
+                    return JSONResponse(content=result_obj, status_code=status.HTTP_404_NOT_FOUND)
+                result_obj["value"], result_obj["errors"] = await executors.run_cpu(match_pool.match_many,
+                                                                                      regex_pattern, texts)
+            else:
+                result_obj["message"] = "Error. The regex must be a non-empty string"
+                return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
+        else:
+            if not isinstance(patterns, dict) or not all(isinstance(t, list) for t in patterns.values()):
+                result_obj["message"] = "Error. Patterns must map each regex to a list of texts"
+                return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
+            result_obj["value"], result_obj["errors"] = await executors.run_cpu(__match_patterns, patterns)
+    except match_pool.MatchPoolBusyError as e:
+        result_obj["message"] = f"Error. Message: {str(e)}"
+        return JSONResponse(content=result_obj, status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={"Retry-After": "1"})
+
+    result_obj["message"] = "Successfully matched the patterns"
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
+
+def __match_texts(regex: str, texts: list) -> tuple[list, list]:
+    try:
+        regex_pattern = __compile(regex)
+    except re.error as e:
+        return [None] * len(texts), [{"index": None, "message": f"Invalid regex: {str(e)}"}]
+    return match_pool.match_many(regex_pattern, texts)
+
+
+def __match_patterns(patterns: dict) -> tuple[dict, dict]:
+    values = {}
+    errors = {}
+    for regex, texts in patterns.items():
+        values[regex], regex_errors = __match_texts(regex, texts)
+        if regex_errors:
+            errors[regex] = regex_errors
+    return values, errors
+
+
+@app.websocket(api_endpoint + "/ws/validate")
+async def live_validation(websocket: WebSocket):
+    await websocket.accept()
+    session = LiveSession()
+    changed = asyncio.Event()
+    evaluator = asyncio.create_task(__evaluate_session(websocket, session, changed))
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                # Ungültiges JSON (JSONDecodeError ist ein ValueError) beendet die Sitzung nicht
+                message = json.loads(frame)
+                if not isinstance(message, dict):
+                    raise ValueError("Message must be a JSON object")
+                if message.get("type") == "pattern":
+                    session.set_pattern(await __session_pattern(message))
+                else:
+                    session.apply(message)
+            except (ValueError, re.error) as e:
+                await websocket.send_json({"type": "error", "message": f"Error. Message: {str(e)}"})
+                continue
+            changed.set()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        evaluator.cancel()
+
+
+async def __session_pattern(message: dict) -> re.Pattern[str]:
+    regex = message.get("regex")
+    pattern_id = message.get("id")
+    if isinstance(regex, str) and len(regex) > 0:
+        return await executors.run_cpu(__compile, regex)
+    if pattern_id is not None:
+        regex_pattern = await executors.run_cpu(pattern_registry.get, str(pattern_id))
+        if regex_pattern is None:
+            raise ValueError("Unknown pattern id")
+        return regex_pattern
+    raise ValueError("Either the regex or the id is required")
+
+
+async def __evaluate_session(websocket: WebSocket, session: LiveSession, changed: asyncio.Event):
+    """Wertet nach einer kurzen Entprellzeit nur den neuesten Stand der Sitzung aus."""
+    while True:
+        await changed.wait()
+        await asyncio.sleep(ws_debounce)
+        changed.clear()
+        snapshot = session.take()
+        if snapshot is None:
+            continue
+        regex_pattern, string, seq = snapshot
+        result_obj = {"type": "result", "seq": seq, "value": False, "message": ""}
+        try:
+            result_obj["value"] = await executors.run_cpu(match_pool.match, regex_pattern, string)
+            result_obj["message"] = "Successfully matched the pattern"
+        except match_pool.MatchTimeoutError as e:
+            result_obj["timeout"] = True
+            result_obj["message"] = f"Error. Message: {str(e)}"
+        except Exception as e:
+            # Ein fehlgeschlagenes Matching darf den Auswerte-Task der Sitzung nicht beenden
+            await websocket.send_json({"type": "error", "seq": seq, "message": f"Error. Message: {str(e)}"})
+            continue
+        await websocket.send_json(result_obj)
+
+
 @app.post(api_endpoint + "/generate")
 async def generate_regex(request: Request) -> JSONResponse:
-    request_body = await request.json()
+    request_body = await __read_json(request)
     string = str(request_body.get("text"))
     filetype = str(request_body.get("filetype"))
     ft = FileType.UNSUPPORTED
-    result_obj = {"value": "", "message": ""}
+    result_obj = {"value": "", "id": None, "message": ""}
 
     if string is None or len(string) == 0 or filetype is None or len(filetype) == 0:
         result_obj["message"] = "Error. Either the text or the filetype was null"
         return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
     elif filetype is not None and len(filetype) > 0:
         bad_type = False
-        try:
-            ft = FileType[filetype.upper()]
-            bad_type = ft == FileType.UNSUPPORTED
-        except Exception:
-            bad_type = True
+        with metrics.stage_duration.time(stage="filetype_resolve"):
+            try:
+                ft = FileType[filetype.upper()]
+                bad_type = ft == FileType.UNSUPPORTED
+            except Exception:
+                bad_type = True
 
         if bad_type:
             result_obj["message"] = "Error. File type is not supported"
             return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
 
     try:
-        result = logic.generate_regex(filetype=ft, string=string)
+        result = await executors.run_cpu(generate_cache.generate_regex, filetype=ft, string=string)
         result_obj["value"] = result
+        result_obj["id"] = await executors.run_cpu(pattern_registry.register, result)
         result_obj["message"] = "Successfully generated regex pattern"
         return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
     except Exception as e:
         result_obj["message"] = f"Error. Message: {str(e)}"
         return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
 
+@app.get(api_endpoint + "/health/live")
+async def liveness() -> JSONResponse:
+    result_obj = {"value": {"status": "alive", "models": ml_loader.states()}, "message": "Server is alive"}
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
+@app.get(api_endpoint + "/health/ready")
+async def readiness() -> JSONResponse:
+    ready = ml_loader.is_ready()
+    result_obj = {"value": {"ready": ready, "model": ml_loader.default_model, "models": ml_loader.states()},
+                  "message": "Server is ready" if ready else f"Model {ml_loader.default_model} is not ready ({ml_loader.state()})"}
+    return JSONResponse(content=result_obj,
+                        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@app.get(api_endpoint + "/startup")
+async def startup_timings() -> JSONResponse:
+    result_obj = {"value": ml_loader.timings(), "message": "Successfully collected startup timings"}
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
+@app.get(api_endpoint + "/generate/cache")
+async def generate_cache_stats() -> JSONResponse:
+    result_obj = {"value": generate_cache.stats(), "message": "Successfully collected cache statistics"}
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
+@app.put(api_endpoint + "/generate/cache")
+async def configure_generate_cache(request: Request) -> JSONResponse:
+    request_body = await __read_json(request)
+    is_enabled = request_body.get("enabled")
+    result_obj = {"value": None, "message": ""}
+
+    if type(is_enabled) is not bool:
+        result_obj["message"] = "Error. enabled is null/not a boolean"
+        return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
+
+    generate_cache.set_enabled(is_enabled)
+    result_obj["value"] = generate_cache.stats()
+    result_obj["message"] = "Successfully configured the cache"
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
+@app.delete(api_endpoint + "/generate/cache")
+async def flush_generate_cache() -> JSONResponse:
+    generate_cache.flush()
+    result_obj = {"value": generate_cache.stats(), "message": "Successfully flushed the cache"}
+    return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
+
 @app.post(api_endpoint + "/detectfiletype")
 async def detect_type_text(request: Request) -> JSONResponse:
-    request_body = await request.json()
+    request_body = await __read_json(request)
     string = request_body.get("text")
     is_ml = request_body.get("ml")
-    result_obj = {"value": "", "message": ""}
+    model = request_body.get("model", ml_loader.default_model)
+    result_obj = {"value": "", "engine": "", "message": ""}
 
-    if string is None or len(string) == 0 or is_ml is None or type(is_ml) is not bool:
-        result_obj["message"] = "Error. Either the text or ml is null/not a boolean"
+    if string is None or len(string) == 0 or not (type(is_ml) is bool or is_ml == "auto"):
+        result_obj["message"] = "Error. Either the text is null or ml is not a boolean/\"auto\""
+        return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
+    if model not in ml_loader.models:
+        result_obj["message"] = f"Error. Unknown model, expected one of {list(ml_loader.models)}"
         return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
 
+    note = ""
+    if is_ml is True:
+        # Solange das Modell lädt, antworten die Regeln (oder 503 bei ML_NOT_READY=reject).
+        # Bei "auto" wird erst in __detect geladen, wenn die Regeln nicht eindeutig sind
+        model_state = ml_loader.ensure_loading(model)
+        if model_state != "ready":
+            if is_ml is True and ml_loader.not_ready_mode == "reject":
+                retry_after = ml_loader.retry_after(model)
+                if retry_after is None:
+                    # Endgültig fehlgeschlagen, ein erneuter Versuch ändert nichts
+                    result_obj["message"] = f"Error. Model {model} failed to load: {ml_loader.states()[model]['error']}"
+                    return JSONResponse(content=result_obj, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                result_obj["message"] = f"Error. Model {model} is not ready ({model_state}), please retry later"
+                return JSONResponse(content=result_obj, status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    headers={"Retry-After": str(retry_after)})
+            is_ml = False
+            note = __not_ready_note(model, model_state)
+
     probs: dict
     try:
-        probs = logic.detect_filetype(string=string, is_ml=bool(is_ml))
+        probs, engine, auto_note = await __detect(string=string, is_ml=is_ml, model=model)
+        note += auto_note
     except Exception as e:
         result_obj["message"] = f"Error. Message: {str(e)}"
         return JSONResponse(content=result_obj, status_code=status.HTTP_400_BAD_REQUEST)
 
-    result_obj["message"] = "Successfully detected file type"
+    result_obj["message"] = "Successfully detected file type" + note
     result_obj["value"] = probs
+    result_obj["engine"] = engine
     return JSONResponse(content=result_obj, status_code=status.HTTP_200_OK)
 
+
+def __not_ready_note(model: str, model_state: str) -> str:
+    return f" (model {model} is not ready ({model_state}), used rules)"
+
+
+async def __detect(string: str, is_ml: bool | str, model: str) -> tuple[dict, str, str]:
+    """
+    Erkennt den Dateityp und liefert zusätzlich die verwendete Engine ("ml", "ngram" oder "rules")
+    sowie einen Hinweis, falls "auto" mangels bereitem Modell auf die Regeln zurückfällt.
+    Transformer-Anfragen laufen durch die Admission Control, ist sie ausgelastet, wird regelbasiert geantwortet.
+    Das n-Gramm-Modell braucht nur Bruchteile einer Millisekunde und läuft direkt im CPU-Pool.
+    Im Modus "auto" wird das Modell nur gefragt, wenn keine oder mehrere Regeln passen.
+    """
+    if is_ml == "auto":
+        filetypes = await executors.run_cpu(logic.matching_filetypes, string=string)
+        if len(filetypes) == 1:
+            auto_total.inc(engine="rules")
+            probs = {filetype.name: 0.0 for filetype in FileType}
+            probs[filetypes[0].name] = 1.0
+            return probs, "rules", ""
+        # Erst hier (Regeln nicht eindeutig) wird das Modell bei Bedarf geladen
+        model_state = ml_loader.ensure_loading(model)
+        if model_state != "ready":
+            probs = await executors.run_cpu(logic.detect_filetype, string=string, is_ml=False)
+            return probs, "rules", __not_ready_note(model, model_state)
+        auto_total.inc(engine="ml")
+        is_ml = True
+    if is_ml and model == "ngram":
+        return await executors.run_cpu(logic.detect_filetype, string=string, is_ml=True, model="ngram"), "ngram", ""
+    if is_ml and await admission.limiter.acquire():
+        try:
+            return await executors.run_inference(logic.detect_filetype, string=string, is_ml=True,
+                                                  model="transformer"), "ml", ""
+        finally:
+            admission.limiter.release()
+    return await executors.run_cpu(logic.detect_filetype, string=string, is_ml=False), "rules", ""
+
 def start_api():
     print(f"App läuft auf {url}:{port}")
-    uvicorn.run(app, host=url, port=port)
+    if workers > 1:
+        # Pattern-IDs und Metriken über alle Prozesse hinweg teilen
+        shared_dir = tempfile.mkdtemp(prefix="regexgen-")
+        if pattern_registry.store_dir is None:
+            pattern_registry.store_dir = os.path.join(shared_dir, "patterns")
+        metrics.shared_dir = shared_dir
+        generate_cache.shared_dir = shared_dir
+        # Mit ML_PRELOAD beantworten die Worker sofort Regeln und Health-Endpunkte, während der Master das Modell
+        # einmal lädt; danach werden sie durch Worker ersetzt, die die Gewichte per Copy-on-Write teilen.
+        # Kein Forward-Pass und keine ONNX-Session im Master (beides nicht fork-sicher), Backend-Wahl und Warm-up laufen im Worker
+        try:
+            prefork.serve(app, host=url, port=port, workers=workers,
+                          preload=ml_loader.get_default if ml_loader.preload else None,
+                          defer_loading=ml_loader.defer_to_master)
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+    else:
+        uvicorn.run(app, host=url, port=port)
 
 if __name__ == '__main__':
-    ml.transformer.prepare_model()
-    print(f"Testing with string: \"<root></root>\": {str(ml.transformer.predict("<root></root>"))}")
     start_api()
@@ -0,0 +1,79 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+import numpy as np
+from backend import metrics
+
+batch_size_histogram = metrics.Histogram("regexgen_ml_batch_chunks", "Chunks per batched forward pass",
+                                         buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64))
+batch_wait_histogram = metrics.Histogram("regexgen_ml_batch_wait_seconds",
+                                         "Time a request waited for its batch to start")
+
+
+class BatchScheduler:
+    """
+    Sammelt die Chunks gleichzeitiger Vorhersagen für höchstens `window` Sekunden
+    bzw. bis `max_batch` Chunks und berechnet sie in einem gemeinsamen Forward-Pass.
+    forward erhält eine Liste von Chunks und liefert ein Array mit einer Zeile pro Chunk.
+    """
+
+    def __init__(self, forward: Callable[[list], np.ndarray], max_batch: int, window: float):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.max_batch = max_batch
+        self.window = window
+        self._forward = forward
+        self._queue: queue.Queue = queue.Queue()
+        self._carry = None
+        self._thread = threading.Thread(target=self.__loop, name="ml-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, chunks: list) -> np.ndarray:
+        """Blockiert, bis der Batch mit diesen Chunks berechnet ist, und liefert deren Zeilen."""
+        future: Future = Future()
+        self._queue.put((chunks, future, time.perf_counter()))
+        return future.result()
+
+    def __next_request(self, timeout: float | None):
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            return request
+        return self._queue.get(timeout=timeout) if timeout is not None else self._queue.get()
+
+    def __loop(self):
+        while True:
+            batch = [self.__next_request(timeout=None)]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                try:
+                    request = self.__next_request(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if size + len(request[0]) > self.max_batch:
+                    # Passt nicht mehr in diesen Batch, eröffnet den nächsten
+                    self._carry = request
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self.__run(batch, size)
+
+    def __run(self, batch: list, size: int):
+        started = time.perf_counter()
+        for _, _, submitted in batch:
+            batch_wait_histogram.observe(started - submitted)
+        batch_size_histogram.observe(size)
+
+        try:
+            rows = self._forward([chunk for chunks, _, _ in batch for chunk in chunks])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for chunks, future, _ in batch:
+            future.set_result(rows[offset:offset + len(chunks)])
+            offset += len(chunks)
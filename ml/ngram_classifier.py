@@ -0,0 +1,238 @@
+"""
+Leichtgewichtiger Dateityp-Klassifikator ohne torch.
+
+Merkmale sind gehashte Zeichen-n-Gramme (1 bis 3) und einige Strukturmerkmale
+(Anteile von <, {, ;, Zeilenumbrüchen, ...), das Modell ist eine multinomiale
+logistische Regression. Merkmale, Training und Inferenz verwenden nur NumPy.
+
+    python -m ml.ngram_classifier train [--rows N] [--epochs N]
+    python -m ml.ngram_classifier compare [--limit N]
+
+compare misst Genauigkeit und Latenz auf den zurückgehaltenen Daten, zum Vergleich
+auch mit dem DistilBERT-Modell aus ml.transformer.
+"""
+import argparse
+import csv
+import functools
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from backend.enums.FileType import FileType as ft
+from synth_datasets.dataset_central_generator import dataset_files
+
+path = '../ml_results/'
+data_path = '../synth_datasets'
+model_path = os.environ.get("NGRAM_MODEL_PATH", path + 'ngram_model.npz')
+
+hash_bits = 14
+ngram_sizes = (1, 2, 3)
+# Bei langen Texten gehen nur Anfang und Ende in die Merkmale ein
+max_chars = 4096
+structure_chars = '<>{}[]",;\t|:=/\n'
+# Anteile der Strukturzeichen, erstes Zeichen "<" bzw. "{"/"[", log. Länge
+n_structure = len(structure_chars) + 3
+labels = 4  # Label-Index = FileType-Wert (JSON, XML, CSV, HTML)
+holdout_fraction = 0.1
+
+weights: np.ndarray | None = None
+bias: np.ndarray | None = None
+__lock = threading.Lock()
+__structure_bytes = np.frombuffer(structure_chars.encode('ascii'), dtype=np.uint8)
+
+
+# Merkmale #########
+def features(text: str, bits: int = hash_bits) -> np.ndarray:
+    """Merkmalsvektor eines Textes: L2-normierte n-Gramm-Zählungen (log) gefolgt von den Strukturmerkmalen."""
+    if len(text) > max_chars:
+        text = text[:max_chars // 2] + '\n' + text[-(max_chars // 2):]
+    data = np.frombuffer(text.lower().encode('utf-8', 'replace'), dtype=np.uint8).astype(np.int64)
+    size = 1 << bits
+    vector = np.zeros(size + n_structure, dtype=np.float32)
+    if len(data) == 0:
+        return vector
+
+    for n in ngram_sizes:
+        count = len(data) - n + 1
+        if count < 1:
+            break
+        hashes = np.full(count, n, dtype=np.int64)
+        for i in range(n):
+            hashes = hashes * 257 + data[i:i + count]
+        # Multiplikatives Hashing: die oberen Bits des 32-Bit-Produkts sind der Bucket
+        buckets = ((hashes * 0x9E3779B1) & 0xFFFFFFFF) >> (32 - bits)
+        vector[:size] += np.bincount(buckets, minlength=size)
+    ngrams = np.log1p(vector[:size])
+    vector[:size] = ngrams / np.linalg.norm(ngrams)
+
+    byte_counts = np.bincount(data, minlength=256)
+    vector[size:size + len(structure_chars)] = 10.0 * byte_counts[__structure_bytes] / len(data)
+    first = text.lstrip()[:1]
+    vector[-3] = first == '<'
+    vector[-2] = first in ('{', '[')
+    vector[-1] = np.log1p(len(data)) / 10.0
+    return vector
+
+
+def features_batch(texts: list, bits: int = hash_bits) -> np.ndarray:
+    return np.stack([features(text, bits) for text in texts])
+
+
+def __softmax(x: np.ndarray) -> np.ndarray:
+    e_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e_x / np.sum(e_x, axis=-1, keepdims=True)
+
+
+# Daten #########
+def load_rows(folder: str = data_path, seed: int = 0) -> tuple[list, list]:
+    """Liest die synthetischen Datensätze (Arrow oder CSV mit ";") und teilt sie reproduzierbar in Training und Holdout."""
+    csv.field_size_limit(sys.maxsize)
+    rows = []
+    for file in dataset_files(folder):
+        if file.suffix == ".arrow":
+            import pyarrow as pa
+            with pa.memory_map(str(file)) as source:
+                table = pa.ipc.open_stream(source).read_all()
+            rows.extend(zip(table.column("text").to_pylist(), table.column("label").to_pylist()))
+            continue
+        with open(file, newline='', encoding='utf-8') as f:
+            rows.extend((row["text"], int(row["label"])) for row in csv.DictReader(f, delimiter=';'))
+    if not rows:
+        raise RuntimeError(f"No datasets found in \"{folder}\"")
+    random.Random(seed).shuffle(rows)
+    split = int(len(rows) * (1 - holdout_fraction))
+    return rows[:split], rows[split:]
+
+
+# Training #########
+def train(rows: list, epochs: int = 5, batch_size: int = 256, learning_rate: float = 0.5,
+          l2: float = 1e-6, bits: int = hash_bits, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Mini-Batch-Gradientenabstieg auf der Kreuzentropie, die Merkmale werden pro Batch berechnet."""
+    rng = np.random.default_rng(seed)
+    w = np.zeros(((1 << bits) + n_structure, labels), dtype=np.float32)
+    b = np.zeros(labels, dtype=np.float32)
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        order = rng.permutation(len(rows))
+        loss = 0.0
+        for i in range(0, len(rows), batch_size):
+            batch = [rows[j] for j in order[i:i + batch_size]]
+            x = features_batch([text for text, _ in batch], bits)
+            y = np.array([label for _, label in batch])
+            probs = __softmax(x @ w + b)
+            loss += float(-np.sum(np.log(probs[np.arange(len(y)), y] + 1e-12)))
+            probs[np.arange(len(y)), y] -= 1.0
+            grad = probs / len(y)
+            w -= learning_rate * (x.T @ grad + l2 * w)
+            b -= learning_rate * grad.sum(axis=0)
+        print(f"Epoch {epoch + 1}/{epochs}: loss {loss / len(rows):.4f} ({time.perf_counter() - start:.1f}s)")
+    return w, b
+
+
+def save(w: np.ndarray, b: np.ndarray, file: str = model_path):
+    Path(file).parent.mkdir(parents=True, exist_ok=True)
+    np.savez(file, weights=w, bias=b)
+    print(f"Saved n-gram model to \"{file}\"")
+
+
+# api #############
+def load(file: str = model_path):
+    """Lädt die Gewichte aus der .npz-Datei (NGRAM_MODEL_PATH)."""
+    global weights
+    global bias
+    if not Path(file).is_file():
+        raise RuntimeError(f"No n-gram model found at \"{file}\". Run python -m ml.ngram_classifier train")
+    with __lock:
+        with np.load(file) as data:
+            weights = data["weights"]
+            bias = data["bias"]
+    print(f"Loaded n-gram model from \"{file}\"")
+
+
+def __bits() -> int:
+    return int(weights.shape[0] - n_structure).bit_length() - 1
+
+
+def predict_probs(texts: list) -> np.ndarray:
+    if weights is None:
+        raise RuntimeError("The n-gram model is not loaded")
+    return __softmax(features_batch(texts, __bits()) @ weights + bias)
+
+
+def predict(text: str) -> dict:
+    """Vorhersage im selben Format wie ml.transformer.predict."""
+    probs = predict_probs([text])[0]
+    mapped_probs = {ft(idx).name: round(float(val), 2) for idx, val in enumerate(probs)}
+    mapped_probs["UNSUPPORTED"] = 0.0
+    return mapped_probs
+
+
+def warmup_inputs(texts: list, lengths: list, batch_sizes: list):
+    """Eingaben für das Warm-up, pro Batchgröße ein Aufruf (die Tokenlängen spielen hier keine Rolle)."""
+    for batch_size in batch_sizes:
+        batch = [texts[i % len(texts)] for i in range(batch_size)]
+        yield {"batch_size": batch_size}, functools.partial(predict_probs, batch)
+
+
+# Vergleich #########
+def __evaluate(name: str, predict_one, rows: list) -> dict:
+    correct = 0
+    durations = []
+    for text, label in rows:
+        start = time.perf_counter()
+        probs = predict_one(text)
+        durations.append(time.perf_counter() - start)
+        correct += max(probs, key=probs.get) == ft(label).name
+    result = {
+        "engine": name,
+        "accuracy": round(correct / len(rows), 4),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "p95_ms": round(sorted(durations)[int(len(durations) * 0.95) - 1] * 1000, 3),
+    }
+    print(f"{name:<12} accuracy {result['accuracy']:.4f}  median {result['median_ms']} ms  p95 {result['p95_ms']} ms")
+    return result
+
+
+def compare(limit: int, with_transformer: bool = True) -> list:
+    """Genauigkeit und Latenz beider Engines auf denselben zurückgehaltenen Beispielen."""
+    _, holdout = load_rows()
+    holdout = holdout[:limit]
+    print(f"Comparing on {len(holdout)} held-out rows")
+    load()
+    results = [__evaluate("ngram", predict, holdout)]
+    if with_transformer:
+        import ml.transformer as transformer
+        transformer.prepare_model()
+        results.append(__evaluate("transformer", transformer.predict, holdout))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the NumPy n-gram file type classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_parser = sub.add_parser("train", help="train on the synth_datasets CSV files and save the weights")
+    train_parser.add_argument("--rows", type=int, default=None, help="use at most N training rows")
+    train_parser.add_argument("--epochs", type=int, default=5)
+    compare_parser = sub.add_parser("compare", help="compare accuracy and latency with DistilBERT")
+    compare_parser.add_argument("--limit", type=int, default=1000, help="number of held-out rows")
+    compare_parser.add_argument("--no-transformer", action="store_true", help="only evaluate the n-gram model")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        rows, holdout = load_rows()
+        rows = rows[:args.rows] if args.rows else rows
+        print(f"Training on {len(rows)} rows")
+        w, b = train(rows, epochs=args.epochs)
+        save(w, b)
+        load()
+        __evaluate("ngram", predict, holdout)
+    else:
+        compare(args.limit, with_transformer=not args.no_transformer)
+
+
+if __name__ == '__main__':
+    main()
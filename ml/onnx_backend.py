@@ -0,0 +1,79 @@
+"""
+ONNX-Runtime-Backend für den DistilBERT-Klassifikator.
+
+Der Export erzeugt aus dem trainierten Modell eine ONNX-Datei und quantisiert die
+Gewichte dynamisch nach int8. Exportieren mit:
+
+    python -m ml.onnx_backend
+"""
+from pathlib import Path
+import numpy as np
+
+fp32_name = "model.onnx"
+int8_name = "model.int8.onnx"
+
+
+def export(model, tokenizer, out_dir: str | Path) -> Path:
+    """Exportiert das Modell nach ONNX, quantisiert es dynamisch (int8) und liefert den Pfad der int8-Datei."""
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, input_ids, attention_mask):
+            return self.wrapped(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = out_dir / fp32_name
+    int8_path = out_dir / int8_name
+
+    sample = tokenizer(["<root><item>1</item></root>", "a,b\n1,2"], padding=True, return_tensors='pt')
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+        )
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    print(f"Exported ONNX model to \"{fp32_path}\" and int8 model to \"{int8_path}\"")
+    return int8_path
+
+
+class OnnxClassifier:
+    """Inferenz mit ONNX Runtime auf der CPU, liefert die Logits wie das torch-Modell."""
+
+    def __init__(self, model_path: str | Path, threads: int | None = None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+
+    def logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(["logits"], {
+            "input_ids": input_ids.astype(np.int64),
+            "attention_mask": attention_mask.astype(np.int64),
+        })[0]
+
+
+if __name__ == '__main__':
+    import ml.transformer as transformer
+    # Exportiert wird aus den torch-Gewichten, auch wenn bereits ein ONNX-Artefakt existiert (ML_BACKEND=auto)
+    transformer.inference_backend = "torch"
+    transformer.prepare_model()
+    transformer.export_onnx()
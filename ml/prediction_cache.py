@@ -0,0 +1,61 @@
+import hashlib
+import os
+import numpy as np
+from backend import metrics
+from backend.lru_cache import LRUCache
+
+enabled = str(os.environ.get("ML_CACHE_ENABLED", "true")).lower() == "true"
+max_entries = int(os.environ.get("ML_CACHE_ENTRIES", "4096"))
+max_bytes = int(os.environ.get("ML_CACHE_BYTES", str(16 * 1024 * 1024)))
+# Ablaufzeit in Sekunden (0 = kein Ablauf)
+ttl = float(os.environ.get("ML_CACHE_TTL", "0"))
+
+# Schlüssel: (Modellversion, SHA-256 der Chunk-IDs), Wert: gemittelte Wahrscheinlichkeiten
+__cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda probs: probs.nbytes,
+                   ttl=ttl if ttl > 0 else None)
+model_version: str | None = None
+
+metrics.Counter("regexgen_ml_cache_hits_total", "ML prediction cache hits", function=lambda: __cache.hits)
+metrics.Counter("regexgen_ml_cache_misses_total", "ML prediction cache misses", function=lambda: __cache.misses)
+metrics.Counter("regexgen_ml_cache_evictions_total", "ML prediction cache evictions (size and TTL)",
+                function=lambda: __cache.evictions + __cache.expirations)
+metrics.Gauge("regexgen_ml_cache_bytes", "Bytes held in the ML prediction cache",
+              function=lambda: __cache.stats()["bytes"])
+
+
+def chunks_key(chunks: list) -> str:
+    """Hash über genau die Token-IDs, die das Modell sieht (inkl. Chunk-Grenzen)."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        ids = np.asarray(chunk, dtype=np.int64)
+        digest.update(len(ids).to_bytes(4, "little"))
+        digest.update(ids.tobytes())
+    return digest.hexdigest()
+
+
+def get(chunks: list) -> np.ndarray | None:
+    if not enabled or model_version is None:
+        return None
+    return __cache.get((model_version, chunks_key(chunks)))
+
+
+def put(chunks: list, probs: np.ndarray):
+    if not enabled or model_version is None:
+        return
+    __cache.put((model_version, chunks_key(chunks)), probs)
+
+
+def set_model_version(version: str):
+    """Wird nach jedem Laden eines Modells aufgerufen. Ein anderes Modell verwirft alle Einträge."""
+    global model_version
+    if version != model_version:
+        __cache.clear()
+        model_version = version
+
+
+def flush():
+    __cache.clear()
+
+
+def stats() -> dict:
+    return {"enabled": enabled, "model_version": model_version} | __cache.stats()
@@ -0,0 +1,78 @@
+"""
+Längen-gruppierte Batches mit Token-Budget fürs Training.
+
+Statt einer festen Anzahl an Beispielen pro Batch wird ein Budget an (gepaddeten)
+Tokens vorgegeben: Beispiele ähnlicher Länge landen im selben Batch, kurze Chunks
+ergeben große Batches, lange Chunks kleine. Gepaddet wird erst pro Batch im Collator.
+"""
+import random
+
+
+class TokenBudgetBatchSampler:
+    """
+    Liefert Listen von Indizes, deren Länge x Batchgröße max_tokens nicht überschreitet.
+    Die Indizes werden gemischt, in Buckets zu bucket_size Beispielen nach Länge sortiert
+    und die fertigen Batches erneut gemischt. Jede Iteration (Epoche) mischt neu.
+    """
+
+    def __init__(self, lengths: list, max_tokens: int, shuffle: bool = True, bucket_size: int = 4096, seed: int = 0):
+        if max_tokens < max(lengths, default=0):
+            raise ValueError(f"max_tokens ({max_tokens}) is smaller than the longest sample ({max(lengths)})")
+        self.lengths = lengths
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.bucket_size = bucket_size
+        self.seed = seed
+        self.epoch = 0
+        self._batches = self._build(self.epoch)
+
+    def _build(self, epoch: int) -> list:
+        rng = random.Random(self.seed + epoch)
+        indices = list(range(len(self.lengths)))
+        if self.shuffle:
+            rng.shuffle(indices)
+        batches = []
+        for start in range(0, len(indices), self.bucket_size):
+            bucket = sorted(indices[start:start + self.bucket_size], key=lambda i: self.lengths[i])
+            batch, longest = [], 0
+            for index in bucket:
+                longest_with = max(longest, self.lengths[index])
+                if batch and longest_with * (len(batch) + 1) > self.max_tokens:
+                    batches.append(batch)
+                    batch, longest_with = [], self.lengths[index]
+                batch.append(index)
+                longest = longest_with
+            if batch:
+                batches.append(batch)
+        if self.shuffle:
+            rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        batches = self._batches
+        self.epoch += 1
+        self._batches = self._build(self.epoch)
+        return iter(batches)
+
+    def __len__(self) -> int:
+        return len(self._batches)
+
+    def padded_tokens(self) -> int:
+        """Tokens inkl. Padding, wenn jeder Batch auf sein längstes Beispiel gepaddet wird."""
+        return sum(max(self.lengths[i] for i in batch) * len(batch) for batch in self._batches)
+
+
+def padding_report(lengths: list, sampler: TokenBudgetBatchSampler, fixed_length: int = 512) -> dict:
+    """Anteil echter Tokens bei festem Padding auf fixed_length und bei Token-Budget-Batches."""
+    real = sum(lengths)
+    fixed = fixed_length * len(lengths)
+    dynamic = sampler.padded_tokens()
+    return {
+        "real_tokens": real,
+        "fixed_padded_tokens": fixed,
+        "dynamic_padded_tokens": dynamic,
+        "fixed_efficiency": round(real / fixed, 4) if fixed else None,
+        "dynamic_efficiency": round(real / dynamic, 4) if dynamic else None,
+        "expected_speedup": round(fixed / dynamic, 2) if dynamic else None,
+        "batches": len(sampler),
+    }
@@ -1,20 +1,38 @@
 from builtins import callable
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification, TrainingArguments, Trainer
+from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification, TrainingArguments, Trainer, \
+    DataCollatorWithPadding
 import numpy as np
 import torch
 from transformers.modeling_utils import SpecificPreTrainedModelType
+import functools
+import hashlib
 import os
+import threading
+import time
+from backend import metrics
+from backend.ml_loader import ModelUnavailableError
 from backend.enums.FileType import FileType as ft
-from datasets import Dataset
+from datasets import Dataset, concatenate_datasets
 import pandas as pd
 from pathlib import Path
 from huggingface_hub import HfApi
-from synth_datasets.dataset_central_generator import generate_datasets
+from synth_datasets.dataset_central_generator import generate_datasets, is_complete, dataset_files
+from ml.batching import BatchScheduler
+from ml import onnx_backend, prediction_cache
+from ml.token_batching import TokenBudgetBatchSampler, padding_report
+from torch.utils.data import DataLoader
 
 
 def __load_datasets() -> Dataset:
-    folder_path = Path("../synth_datasets")
-    csv_files = list(folder_path.glob("*.csv"))
+    files = dataset_files(data_path)
+    arrow_files = [f for f in files if f.suffix == ".arrow"]
+    if arrow_files:
+        # Memory-Mapping der Arrow-Dateien: kein Parsen, die Daten liegen im Page Cache statt auf dem Python-Heap
+        dataset = concatenate_datasets([Dataset.from_file(str(f)) for f in arrow_files])
+        print(f"Loaded {len(dataset)} rows (memory-mapped from {len(arrow_files)} Arrow files)")
+        return dataset
+
+    csv_files = [f for f in files if f.suffix == ".csv"]
 
     # Liste für alle DataFrames
     df_list = []
@@ -31,33 +49,88 @@ def __load_datasets() -> Dataset:
 
 # Tokenisierung und Chunking #####################
 def __chunk_text(txt: str, chunk_size=512):
-    tokens = tokenizer.tokenize(txt)
+    """Zerlegt den Text direkt in Token-IDs (max. sample_windows Chunks inkl. [CLS]/[SEP])."""
+    if __needs_sampling(txt):
+        return __sample_chunks(txt, chunk_size)
+    return __chunk_ids(tokenizer(txt, add_special_tokens=False, verbose=False)['input_ids'], chunk_size)
+
+def __chunk_ids(ids: list, chunk_size=512):
     chunks = []
-    for i in range(0, len(tokens), chunk_size):
-        chunk_tokens = tokens[i:i + chunk_size]
-        chunks.append(tokenizer.convert_tokens_to_string(chunk_tokens))
-    return chunks[:3]  # max. 3 Chunks
+    for i in range(0, len(ids), chunk_size):
+        # Wie die frühere Re-Tokenisierung der Chunk-Strings: mit [CLS]/[SEP] auf chunk_size gekürzt
+        chunk_ids = ids[i:i + chunk_size][:chunk_size - 2]
+        chunks.append(tokenizer.build_inputs_with_special_tokens(chunk_ids))
+    return chunks[:sample_windows]
+
+def __needs_sampling(txt: str) -> bool:
+    return sampling == "positional" and len(txt) > sample_windows * sample_chars
+
+def __sample_windows(txt: str) -> list:
+    """Gleichmäßig verteilte Zeichenfenster von Anfang bis Ende des Textes."""
+    if sample_windows == 1:
+        return [txt[:sample_chars]]
+    last_start = len(txt) - sample_chars
+    starts = [round(i * last_start / (sample_windows - 1)) for i in range(sample_windows)]
+    return [txt[start:start + sample_chars] for start in starts]
+
+def __sample_chunks(txt: str, chunk_size=512):
+    """Tokenisiert nur die Stichproben-Fenster, die Kosten hängen damit nicht mehr von der Textlänge ab."""
+    encodings = tokenizer(__sample_windows(txt), add_special_tokens=False, verbose=False)['input_ids']
+    return [tokenizer.build_inputs_with_special_tokens(ids[:chunk_size - 2]) for ids in encodings]
+
+def __pad(chunks: list, return_tensors: str | None, padding: bool | str = True, max_length: int | None = None):
+    """Padding der Token-ID-Chunks, liefert input_ids und attention_mask."""
+    return tokenizer.pad({'input_ids': chunks}, padding=padding, max_length=max_length,
+                         return_tensors=return_tensors)
 
 # Dataset chunken #################
-def __chunk_dataset(raw_dataset: Dataset):
-    data = {'text': [], 'label': []}
-    for row in raw_dataset:
-        text = row['text']
-        label = row['label']
-        chunks = __chunk_text(text)
+def __chunk_batch(batch: dict):
+    data = {'input_ids': [], 'label': []}
+    texts = batch['text']
+    # Kurze Texte gemeinsam tokenisieren, lange Texte werden wie bei der Vorhersage gesampelt
+    short = [i for i, text in enumerate(texts) if not __needs_sampling(text)]
+    encodings = tokenizer([texts[i] for i in short], add_special_tokens=False, verbose=False)['input_ids']
+    encoded = dict(zip(short, encodings))
+    for i, (text, label) in enumerate(zip(texts, batch['label'])):
+        chunks = __chunk_ids(encoded[i]) if i in encoded else __sample_chunks(text)
         for chunk in chunks:
-            data['text'].append(chunk)
+            data['input_ids'].append(chunk)
             data['label'].append(label)
+    return data
 
-    return Dataset.from_dict(data)
+def __chunk_dataset(raw_dataset: Dataset):
+    return raw_dataset.map(__chunk_batch, batched=True, remove_columns=raw_dataset.column_names)
 
 # Tokenisierung fürs Training #############
 def __tokenize_lambda(data: dict):
-    return tokenizer(data['text'], padding='max_length', truncation=True, max_length=512)
+    # Kein festes Padding: gepaddet wird erst pro Batch im Collator
+    return {
+        'attention_mask': [[1] * len(ids) for ids in data['input_ids']],
+        'length': [len(ids) for ids in data['input_ids']],
+    }
 
 def __tokenize_dataset(chunked_dataset: Dataset, tokenize_function: callable):
     return chunked_dataset.map(tokenize_function, batched=True)
 
+class TokenBudgetTrainer(Trainer):
+    """Trainer mit längen-gruppierten Batches nach Token-Budget statt fester Batchgröße."""
+
+    def get_train_dataloader(self) -> DataLoader:
+        return self._token_budget_dataloader(self.train_dataset, shuffle=True, description="training")
+
+    def get_eval_dataloader(self, eval_dataset=None) -> DataLoader:
+        dataset = eval_dataset if eval_dataset is not None else self.eval_dataset
+        return self._token_budget_dataloader(dataset, shuffle=False, description="evaluation")
+
+    def _token_budget_dataloader(self, dataset: Dataset, shuffle: bool, description: str) -> DataLoader:
+        sampler = TokenBudgetBatchSampler(dataset['length'], max_tokens=train_tokens_per_batch, shuffle=shuffle,
+                                          seed=self.args.seed)
+        # Entfernt u.a. die Spalte "length", die das Modell nicht kennt
+        dataset = self._remove_unused_columns(dataset, description=description)
+        loader = DataLoader(dataset, batch_sampler=sampler, collate_fn=self.data_collator,
+                            num_workers=self.args.dataloader_num_workers, pin_memory=self.args.dataloader_pin_memory)
+        return self.accelerator.prepare(loader)
+
 # Modell laden und Trainer konfigurieren ###########
 def __train(tokenized_chunked_dataset: Dataset):
     global model
@@ -67,19 +140,24 @@ def __train(tokenized_chunked_dataset: Dataset):
         output_dir=path + 'output',
         do_eval=True,
         learning_rate=2e-5,
-        per_device_train_batch_size=8,
-        per_device_eval_batch_size=8,
         num_train_epochs=3,
         weight_decay=0.01,
         save_total_limit=2
     )
 
-    trainer = Trainer(
+    lengths = train_test['train']['length']
+    report = padding_report(lengths, TokenBudgetBatchSampler(lengths, max_tokens=train_tokens_per_batch))
+    print(f"Padding efficiency: fixed 512 -> {report['fixed_efficiency']:.1%} real tokens, "
+          f"token budget {train_tokens_per_batch} -> {report['dynamic_efficiency']:.1%} real tokens "
+          f"({report['batches']} batches/epoch, expected speed-up {report['expected_speedup']}x)")
+
+    trainer = TokenBudgetTrainer(
         model=model,
         args=training_args,
         train_dataset=train_test['train'],
         eval_dataset=train_test['test'],
-        tokenizer=tokenizer
+        tokenizer=tokenizer,
+        data_collator=DataCollatorWithPadding(tokenizer)
     )
     try:
         print(f"GPU: {torch.cuda.is_available()}")
@@ -87,7 +165,11 @@ def __train(tokenized_chunked_dataset: Dataset):
     except Exception as _:
         print("Training with CPU. Please enable cuda support for acceleration and install the requirements_nvidia_cuda_support.txt via \n pip install --upgrade -r requirements_nvidia_cuda_support.txt")
 
+    start = time.perf_counter()
     trainer.train()
+    duration = time.perf_counter() - start
+    epoch_tokens = report['dynamic_padded_tokens'] * training_args.num_train_epochs
+    print(f"Training took {duration:.1f}s ({epoch_tokens / duration:.0f} padded tokens/s)")
     __save_model_to_hugging_face()
 
 def __save_model_to_hugging_face():
@@ -107,13 +189,66 @@ def __train_model_with_example_data():
 
 # Vorhersage #########
 def __predict(text: str):
-    chunks = __chunk_text(text)
-    inputs = tokenizer(chunks, padding=True, truncation=True, max_length=512, return_tensors='pt')
-    outputs = model(**inputs)
-    probs = __softmax_np(outputs.logits.detach().cpu().numpy(), axis=-1)
+    __ensure_backend()
+    with metrics.stage_duration.time(stage="tokenize"):
+        chunks = __chunk_text(text)
+    avg_probs = prediction_cache.get(chunks)
+    if avg_probs is not None:
+        return avg_probs
+    if batch_window > 0:
+        probs = __get_scheduler().submit(chunks)
+    else:
+        probs = __forward(chunks)
     avg_probs = np.mean(probs, axis=0)  # Durchschnitt über Chunks
+    prediction_cache.put(chunks, avg_probs)
     return avg_probs
 
+def __forward(chunks: list) -> np.ndarray:
+    """Ein (gepaddeter) Forward-Pass über alle Chunks, liefert die Wahrscheinlichkeiten pro Chunk."""
+    __ensure_backend()
+    if onnx_classifier is not None:
+        return __forward_onnx(chunks)
+    return __forward_torch(chunks)
+
+def __forward_torch(chunks: list) -> np.ndarray:
+    with metrics.stage_duration.time(stage="tokenize"):
+        inputs = __pad(chunks, return_tensors='pt')
+    with metrics.stage_duration.time(stage="model_forward"):
+        with torch.no_grad():
+            outputs = model(**inputs)
+    return __softmax_np(outputs.logits.detach().cpu().numpy(), axis=-1)
+
+def __forward_onnx(chunks: list) -> np.ndarray:
+    with metrics.stage_duration.time(stage="tokenize"):
+        inputs = __pad(chunks, return_tensors='np')
+    with metrics.stage_duration.time(stage="model_forward"):
+        logits = onnx_classifier.logits(inputs["input_ids"], inputs["attention_mask"])
+    return __softmax_np(logits, axis=-1)
+
+def warmup_inputs(texts: list, lengths: list, batch_sizes: list):
+    """
+    Eingaben für das Warm-up: pro Tokenlänge und Batchgröße ein Forward-Pass (ohne Cache und Batching).
+    Kurze Beispiele werden wiederholt, bis die gewünschte Länge erreicht ist.
+    """
+    __ensure_backend()
+    for text in texts:
+        __chunk_text(text)
+    encodings = tokenizer(texts, add_special_tokens=False, verbose=False)['input_ids']
+    for length in lengths:
+        length = min(length, 512)
+        chunks = [tokenizer.build_inputs_with_special_tokens((ids * (length // max(1, len(ids)) + 1))[:length - 2])
+                  for ids in encodings]
+        for batch_size in batch_sizes:
+            batch = [chunks[i % len(chunks)] for i in range(batch_size)]
+            yield {"tokens": length, "batch_size": batch_size}, functools.partial(__forward, batch)
+
+def __get_scheduler() -> BatchScheduler:
+    global scheduler
+    with scheduler_lock:
+        if scheduler is None:
+            scheduler = BatchScheduler(forward=__forward, max_batch=max_batch, window=batch_window)
+        return scheduler
+
 def __softmax_np(x, axis=-1):
     x = np.array(x)
     x_max = np.max(x, axis=axis, keepdims=True)
@@ -124,19 +259,68 @@ path = '../ml_results/'
 trainer_path = path + 'distilbert_trained'
 data_path = '../synth_datasets'
 repo_id = 'SumoOW/distilbert-base-uncased'
-tokenizer: DistilBertTokenizer
+# Lokales, fest gepinntes Modellverzeichnis (wird ohne Netzwerkzugriff geladen)
+model_dir = os.environ.get("MODEL_DIR")
+# Offline-Modus: kein Hub-Zugriff und kein Training, fehlt das lokale Modell, schlägt der Start sofort fehl
+offline = str(os.environ.get("MODEL_OFFLINE", "false")).lower() == "true"
+tokenizer: DistilBertTokenizerFast
 model: SpecificPreTrainedModelType
+# Chunking: prefix (erste Chunks des Textes) oder positional (Fenster an Anfang, Mitte und Ende langer Texte)
+sampling = str(os.environ.get("ML_SAMPLING", "positional")).lower()
+sample_windows = int(os.environ.get("ML_SAMPLE_WINDOWS", "3"))
+sample_chars = int(os.environ.get("ML_SAMPLE_CHARS", "2048"))
+if sample_windows < 1 or sample_chars < 1:
+    raise ValueError("ML_SAMPLE_WINDOWS and ML_SAMPLE_CHARS must be at least 1")
+# Token-Budget pro Trainings-Batch (Summe der auf die längste Sequenz gepaddeten Tokens, 8 x 512 wie zuvor im schlechtesten Fall)
+train_tokens_per_batch = int(os.environ.get("TRAIN_TOKENS_PER_BATCH", "4096"))
+# Micro-Batching gleichzeitiger Vorhersagen (0 = aus)
+batch_window = float(os.environ.get("ML_BATCH_WINDOW_MS", "0")) / 1000
+max_batch = int(os.environ.get("ML_MAX_BATCH", "32"))
+scheduler: BatchScheduler | None = None
+scheduler_lock = threading.Lock()
+# Inferenz-Backend: torch, onnx (int8-quantisiert) oder auto (onnx, falls exportiert und paritätsgeprüft)
+inference_backend = str(os.environ.get("ML_BACKEND", "auto")).lower()
+onnx_dir = os.environ.get("ONNX_DIR", path + 'onnx')
+onnx_parity_tolerance = float(os.environ.get("ONNX_PARITY_TOLERANCE", "0.05"))
+onnx_classifier: onnx_backend.OnnxClassifier | None = None
+# Das Backend wird erst im Prozess gewählt, der die Vorhersagen rechnet (nach einem fork, s. __ensure_backend)
+model_fingerprint: str | None = None
+backend_ready = False
+backend_lock = threading.Lock()
+parity_samples = [
+    '{"name": "Alice", "age": 30, "tags": ["a", "b"]}',
+    '<root><entry id="1"><value>42</value></entry></root>',
+    '<html><body><div class="x"><p>Text</p></div></body></html>',
+    'id,name,value\n1,abc,2.5\n2,def,3.5',
+]
 
 # api ##############################################
-def prepare_model():
+def prepare_model(allow_training: bool = True):
+    """
+    Lädt das Modell aus MODEL_DIR, sonst vom Hugging Face Hub, sonst wird es trainiert (nur mit allow_training,
+    die API lädt mit allow_training=False und schlägt stattdessen fehl).
+    """
     global tokenizer
     global model
+    global model_fingerprint
+    global onnx_classifier
+    global backend_ready
 
     data_rows = 80000
-    if __is_hf_model_available():
+    if __is_local_model_available():
+        print(f"Loading model from local directory \"{model_dir}\"")
+        tokenizer = DistilBertTokenizerFast.from_pretrained(model_dir, local_files_only=True)
+        model = DistilBertForSequenceClassification.from_pretrained(model_dir, num_labels=4, local_files_only=True)
+    elif offline:
+        raise ModelUnavailableError(f"Offline mode: no local model found in MODEL_DIR \"{model_dir}\"")
+    elif __is_hf_model_available():
         print(f"Loading pre-trained model from hugging face repo \"{repo_id}\"")
-        tokenizer = DistilBertTokenizer.from_pretrained(repo_id)
+        tokenizer = DistilBertTokenizerFast.from_pretrained(repo_id)
         model = DistilBertForSequenceClassification.from_pretrained(repo_id, num_labels=4)
+        __save_model_locally()
+    elif not allow_training:
+        raise ModelUnavailableError(f"No local model in MODEL_DIR \"{model_dir}\" and the hugging face repo \"{repo_id}\" "
+                                    f"is not available. Train the model offline, the API does not train")
     else:
         print(f"No pre-trained hugging face model from repo \"{repo_id}\" found")
         if not __is_datasets_created():
@@ -145,15 +329,103 @@ def prepare_model():
             print("Created data")
 
         print("Beginning training with data")
-        tokenizer = DistilBertTokenizer.from_pretrained('distilbert-base-uncased')
+        tokenizer = DistilBertTokenizerFast.from_pretrained('distilbert-base-uncased')
         model = DistilBertForSequenceClassification.from_pretrained('distilbert-base-uncased', num_labels=4)
         __train_model_with_example_data()
+        __save_model_locally()
 
     model.eval()
+    model_fingerprint = __model_fingerprint()
+    onnx_classifier = None
+    backend_ready = False
     print("Preperation Done. Model in eval mode")
 
+def __ensure_backend():
+    """
+    Wählt das Backend (ONNX-Session und Paritätsprüfung) beim ersten Forward-Pass bzw. im Warm-up.
+    Beides ist nicht fork-sicher und darf daher nicht schon beim Laden im Master (prefork) laufen.
+    """
+    global backend_ready
+    if backend_ready:
+        return
+    with backend_lock:
+        if backend_ready:
+            return
+        __prepare_onnx()
+        backend = 'onnx' if onnx_classifier is not None else 'torch'
+        # Ein anderes Modell (oder Backend) verwirft die zwischengespeicherten Vorhersagen
+        prediction_cache.set_model_version(f"{model_fingerprint}:{backend}")
+        print(f"Inference backend: {backend} (pid {os.getpid()})")
+        backend_ready = True
+
+def __model_fingerprint() -> str:
+    """Hash der Klassifikationsschichten, unterscheidet Modelle ohne alle Gewichte zu hashen."""
+    digest = hashlib.sha256()
+    for name, tensor in model.state_dict().items():
+        if name.startswith(("pre_classifier.", "classifier.")):
+            digest.update(name.encode("utf-8"))
+            digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def __prepare_onnx():
+    """Lädt das int8-ONNX-Modell, falls vorhanden, und prüft es gegen die torch-Ausgaben."""
+    global onnx_classifier
+    global model
+
+    onnx_classifier = None
+    if inference_backend == "torch":
+        return
+    onnx_path = Path(onnx_dir) / onnx_backend.int8_name
+    if not onnx_path.is_file():
+        if inference_backend == "onnx":
+            raise RuntimeError(f"ML_BACKEND=onnx but no ONNX model found at \"{onnx_path}\". Run python -m ml.onnx_backend")
+        return
+
+    try:
+        candidate = onnx_backend.OnnxClassifier(onnx_path, threads=torch.get_num_threads())
+    except ImportError as e:
+        if inference_backend == "onnx":
+            raise
+        print(f"ONNX Runtime not available ({e}), using torch")
+        return
+
+    sample_chunks = [chunk for sample in parity_samples for chunk in __chunk_text(sample)]
+    expected = __forward_torch(sample_chunks)
+    onnx_classifier = candidate
+    actual = __forward_onnx(sample_chunks)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    same_labels = bool(np.all(np.argmax(expected, axis=-1) == np.argmax(actual, axis=-1)))
+    if max_diff > onnx_parity_tolerance or not same_labels:
+        onnx_classifier = None
+        message = f"ONNX parity check failed (max diff {max_diff:.4f}, same labels: {same_labels})"
+        if inference_backend == "onnx":
+            raise RuntimeError(message)
+        print(f"{message}, using torch")
+        return
+
+    print(f"Using ONNX Runtime backend \"{onnx_path}\" (parity max diff {max_diff:.4f})")
+    # Die torch-Gewichte werden für die Inferenz nicht mehr gebraucht
+    model = None
+
+def export_onnx() -> Path:
+    """Exportiert das geladene torch-Modell als int8-quantisiertes ONNX-Modell nach ONNX_DIR."""
+    if model is None:
+        raise RuntimeError("The torch model is not loaded")
+    return onnx_backend.export(model, tokenizer, onnx_dir)
+
 def __is_datasets_created() -> bool:
-    return sum(fname.endswith('.csv') for fname in os.listdir(data_path)) == 4
+    return is_complete(data_path)
+
+def __is_local_model_available() -> bool:
+    return model_dir is not None and (Path(model_dir) / "config.json").is_file()
+
+def __save_model_locally():
+    """Pinnt das geladene Modell in MODEL_DIR, damit weitere Starts ohne Netzwerk auskommen."""
+    if model_dir is None:
+        return
+    model.save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    print(f"Saved model and tokenizer to local directory \"{model_dir}\"")
 
 def __is_hf_model_available() -> bool:
     global repo_id
@@ -44,17 +44,17 @@ def generate_csv_example():
 
     return "\n".join(lines)
 
-def generate(rows=5000):  # Anzahl CSV-Beispiele
-    data = []
+label = 2  # Label 2 = CSV
 
-    for _ in range(rows):
-        csv_text = generate_csv_example()
-        data.append((csv_text, 2))  # Label 2 = CSV
+def generate_example():
+    return generate_csv_example()
 
-    csv_path = "../synth_datasets/csv_dataset.csv"
+def generate(rows=5000, csv_path="../synth_datasets/csv_dataset.csv"):  # Anzahl CSV-Beispiele
+    # Zeilen werden direkt geschrieben, der Speicherbedarf hängt nicht von rows ab
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f, delimiter=';')
         writer.writerow(["text", "label"])
-        writer.writerows(data)
+        for _ in range(rows):
+            writer.writerow((generate_example(), label))
 
-    print(f"Datei '{csv_path}' erfolgreich erstellt ({len(data)} Beispiele).")
+    print(f"Datei '{csv_path}' erfolgreich erstellt ({rows} Beispiele).")
@@ -1,8 +1,127 @@
+"""
+Erzeugt die synthetischen Trainingsdaten parallel in Shards.
+
+Jeder Generator (CSV, HTML, XML, JSON) erzeugt rows_total / 4 Zeilen, aufgeteilt in
+Shards zu höchstens shard_rows Zeilen. Die Shards laufen in einem Prozess-Pool, jeder
+mit eigenem Seed (abgeleitet aus seed, Generator und Shard-Nummer), sodass das Ergebnis
+unabhängig von der Anzahl der Worker reproduzierbar ist. Zeilen werden direkt in die
+Shard-Dateien geschrieben, der Speicherbedarf bleibt damit unabhängig von rows_total.
+
+Format (DATASET_FORMAT): arrow (Arrow-IPC-Stream, wird von datasets per Memory-Mapping
+geladen, Standard) oder csv (mit ";" getrennt).
+
+    python -m synth_datasets.dataset_central_generator --rows 80000 --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from synth_datasets import csvgenerator, htmlgenerator, xmlgenerator, jsongenerator
 
-def generate_datasets(rows_total: int):
-    parted = rows_total // 4
-    csvgenerator.generate(rows=parted)
-    htmlgenerator.generate(rows=parted)
-    xmlgenerator.generate(rows=parted)
-    jsongenerator.generate(rows=parted)
\ No newline at end of file
+data_path = '../synth_datasets'
+manifest_name = 'dataset_manifest.json'
+shard_rows = int(os.environ.get("DATASET_SHARD_ROWS", "10000"))
+dataset_format = str(os.environ.get("DATASET_FORMAT", "arrow")).lower()
+formats = ("arrow", "csv")
+# Zeilen pro Record Batch beim Schreiben der Arrow-Dateien
+arrow_batch_rows = 1000
+generators = {
+    "csv": csvgenerator,
+    "html": htmlgenerator,
+    "xml": xmlgenerator,
+    "json": jsongenerator,
+}
+
+
+def generate_datasets(rows_total: int, workers: int | None = None, seed: int = 0, out_dir: str = data_path,
+                      rows_per_shard: int = shard_rows, fmt: str = dataset_format) -> list:
+    """Erzeugt alle Shards und schreibt zum Schluss das Manifest. Liefert die Pfade der Shard-Dateien."""
+    if fmt not in formats:
+        raise ValueError(f"Unknown dataset format \"{fmt}\", expected one of {formats}")
+    start = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Alte Shards und Manifest entfernen, damit keine Reste früherer Läufe mitgeladen werden
+    (out_dir / manifest_name).unlink(missing_ok=True)
+    for name in generators:
+        for fmt_suffix in formats:
+            for old in out_dir.glob(f"{name}_dataset*.{fmt_suffix}"):
+                old.unlink()
+
+    parted = rows_total // len(generators)
+    tasks = []
+    for name in generators:
+        for index, offset in enumerate(range(0, parted, rows_per_shard)):
+            shard_path = out_dir / f"{name}_dataset-{index:05d}.{fmt}"
+            tasks.append((name, index, min(rows_per_shard, parted - offset), seed, str(shard_path), fmt))
+
+    # spawn statt fork: der Aufrufer (z.B. prepare_model) kann bereits weitere Threads gestartet haben
+    # (torch, tokenizers, Server), ein fork eines solchen Prozesses kann hängen bleiben
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        shards = list(pool.map(__generate_shard, tasks))
+
+    manifest = {"rows_total": parted * len(generators), "seed": seed, "format": fmt,
+                "shards": [Path(p).name for p in shards]}
+    with open(out_dir / manifest_name, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Created {manifest['rows_total']} rows in {len(shards)} shards ({time.perf_counter() - start:.1f}s)")
+    return shards
+
+
+def __generate_shard(task: tuple) -> str:
+    name, index, rows, seed, shard_path, fmt = task
+    random.seed(f"{seed}:{name}:{index}")
+    if fmt == "arrow":
+        __write_arrow(generators[name], rows, shard_path)
+    else:
+        generators[name].generate(rows=rows, csv_path=shard_path)
+    return shard_path
+
+
+def __write_arrow(module, rows: int, shard_path: str):
+    """Schreibt die Beispiele als Arrow-IPC-Stream (das Format, das datasets.Dataset.from_file erwartet)."""
+    import pyarrow as pa
+    schema = pa.schema([("text", pa.string()), ("label", pa.int64())])
+    with pa.OSFile(shard_path, "wb") as sink, pa.ipc.new_stream(sink, schema) as writer:
+        for offset in range(0, rows, arrow_batch_rows):
+            count = min(arrow_batch_rows, rows - offset)
+            texts = [module.generate_example() for _ in range(count)]
+            writer.write_batch(pa.record_batch([texts, [module.label] * count], schema=schema))
+    print(f"Datei '{shard_path}' erfolgreich erstellt ({rows} Beispiele).")
+
+
+def dataset_files(out_dir: str = data_path) -> list:
+    """Die Dateien des letzten vollständigen Laufs laut Manifest, sonst die alten CSV-Einzeldateien."""
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / manifest_name
+    if manifest_path.is_file():
+        with open(manifest_path, encoding="utf-8") as f:
+            return [out_dir / shard for shard in json.load(f)["shards"]]
+    return sorted(out_dir.glob("*_dataset.csv"))
+
+
+def is_complete(out_dir: str = data_path) -> bool:
+    """Vollständig, wenn das Manifest eines beendeten Laufs und alle Shards vorhanden sind (oder die vier alten Einzeldateien)."""
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / manifest_name
+    if manifest_path.is_file():
+        with open(manifest_path, encoding="utf-8") as f:
+            return all((out_dir / shard).is_file() for shard in json.load(f)["shards"])
+    return all((out_dir / f"{name}_dataset.csv").is_file() for name in generators)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate the synthetic training datasets in parallel shards")
+    parser.add_argument("--rows", type=int, default=80000, help="total number of rows over all file types")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: CPU count)")
+    parser.add_argument("--shard-rows", type=int, default=shard_rows, help="maximum rows per shard file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=data_path, help="output directory")
+    parser.add_argument("--format", choices=formats, default=dataset_format, help="shard file format")
+    args = parser.parse_args()
+    generate_datasets(args.rows, workers=args.workers, seed=args.seed, out_dir=args.out, rows_per_shard=args.shard_rows,
+                      fmt=args.format)
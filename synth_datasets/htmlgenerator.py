@@ -30,9 +30,15 @@ def random_tag():
     return random.choice(base_tags)
 
 def generate_nested_html(tag_name="html", max_depth=3, current_depth=1):
-    max_depth = max_depth - 1
     """Generiert HTML mit Tiefe 2–3, Attributen, Listen und Text."""
-    html = f"<{tag_name}{random_attributes()}>"
+    parts = []
+    __append_nested_html(parts, tag_name, max_depth, current_depth)
+    return "".join(parts)
+
+def __append_nested_html(parts, tag_name, max_depth, current_depth):
+    # Teile werden gesammelt und einmal zusammengefügt statt wiederholt per += kopiert
+    max_depth = max_depth - 1
+    parts.append(f"<{tag_name}{random_attributes()}>")
 
     num_children = random.randint(2, 6)
 
@@ -42,36 +48,35 @@ def generate_nested_html(tag_name="html", max_depth=3, current_depth=1):
 
         # Einfacher Textinhalt
         if element_type == "text" or current_depth >= max_depth:
-            html += f"<{tag}{random_attributes()}>{random_string(random.randint(5, 15))}</{tag}>"
+            parts.append(f"<{tag}{random_attributes()}>{random_string(random.randint(5, 15))}</{tag}>")
 
         # Rekursive Verschachtelung (child)
         elif element_type == "child":
-            html += generate_nested_html(tag, max_depth=max_depth, current_depth=current_depth + 1)
+            __append_nested_html(parts, tag, max_depth=max_depth, current_depth=current_depth + 1)
 
         # Liste (ul/li oder divs)
         elif element_type == "list" and current_depth < max_depth:
             list_tag = random.choice(["ul", "div", "section"])
             item_tag = random.choice(["li", "p", "span"])
             num_items = random.randint(3, 6)
-            html += f"<{list_tag}{random_attributes()}>"
+            parts.append(f"<{list_tag}{random_attributes()}>")
             for _ in range(num_items):
-                html += f"<{item_tag}{random_attributes()}>{random_string(random.randint(3, 12))}</{item_tag}>"
-            html += f"</{list_tag}>"
+                parts.append(f"<{item_tag}{random_attributes()}>{random_string(random.randint(3, 12))}</{item_tag}>")
+            parts.append(f"</{list_tag}>")
 
-    html += f"</{tag_name}>"
-    return html
+    parts.append(f"</{tag_name}>")
 
-def generate(rows=5000):
-    data = []
+label = 3  # Label 3 = HTML
 
-    for _ in range(rows):
-        html_str = generate_nested_html("html", max_depth=random.choice([2, 3]))
-        data.append((html_str, 3))  # Label 3 = HTML
+def generate_example():
+    return generate_nested_html("html", max_depth=random.choice([2, 3]))
 
-    csv_path = "../synth_datasets/html_dataset.csv"
+def generate(rows=5000, csv_path="../synth_datasets/html_dataset.csv"):
+    # Zeilen werden direkt geschrieben, der Speicherbedarf hängt nicht von rows ab
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f, delimiter=';')
         writer.writerow(["text", "label"])
-        writer.writerows(data)
+        for _ in range(rows):
+            writer.writerow((generate_example(), label))
 
-    print(f"Datei '{csv_path}' erfolgreich erstellt ({len(data)} Beispiele).")
\ No newline at end of file
+    print(f"Datei '{csv_path}' erfolgreich erstellt ({rows} Beispiele).")
\ No newline at end of file
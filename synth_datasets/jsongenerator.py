@@ -36,18 +36,17 @@ def generate_nested_json(max_depth=3, current_depth=1):
 
     return obj
 
-def generate(rows=5000):
-    data = []
+label = 0  # Label 0 = JSON
 
-    for _ in range(rows):
-        json_obj = generate_nested_json(max_depth=random.choice([1, 3]))
-        json_str = json.dumps(json_obj)
-        data.append((json_str, 0))  # Label 0 = JSON
+def generate_example():
+    return json.dumps(generate_nested_json(max_depth=random.choice([1, 3])))
 
-    csv_path = "../synth_datasets/json_dataset.csv"
+def generate(rows=5000, csv_path="../synth_datasets/json_dataset.csv"):
+    # Zeilen werden direkt geschrieben, der Speicherbedarf hängt nicht von rows ab
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f, delimiter=';')
         writer.writerow(["text", "label"])  # Header
-        writer.writerows(data)
+        for _ in range(rows):
+            writer.writerow((generate_example(), label))
 
-    print(f"Datei '{csv_path}' erfolgreich erstellt ({len(data)} Beispiele).")
+    print(f"Datei '{csv_path}' erfolgreich erstellt ({rows} Beispiele).")
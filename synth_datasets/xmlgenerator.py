@@ -21,9 +21,15 @@ def random_attributes(num_attrs=None):
 
 
 def generate_nested_xml(tag_name="root", max_depth=3, current_depth=1):
-    max_depth = max_depth - 1
     """Erzeugt verschachtelte XML-Struktur mit Attributen, Listen und mehreren Kindern."""
-    xml = f"<{tag_name}{random_attributes()}>"
+    parts = []
+    __append_nested_xml(parts, tag_name, max_depth, current_depth)
+    return "".join(parts)
+
+def __append_nested_xml(parts, tag_name, max_depth, current_depth):
+    # Teile werden gesammelt und einmal zusammengefügt statt wiederholt per += kopiert
+    max_depth = max_depth - 1
+    parts.append(f"<{tag_name}{random_attributes()}>")
 
     # Anzahl Kinder
     num_children = random.randint(1, 6)
@@ -34,35 +40,34 @@ def generate_nested_xml(tag_name="root", max_depth=3, current_depth=1):
 
         # Textinhalt
         if element_type == "text" or current_depth >= max_depth:
-            xml += f"<{tag}{random_attributes()}>{random_string(random.randint(3,8))}</{tag}>"
+            parts.append(f"<{tag}{random_attributes()}>{random_string(random.randint(3,8))}</{tag}>")
 
         # Rekursive Verschachtelung (child)
         elif element_type == "child":
-            xml += generate_nested_xml(tag, max_depth=max_depth, current_depth=current_depth + 1)
+            __append_nested_xml(parts, tag, max_depth=max_depth, current_depth=current_depth + 1)
 
         # Liste (mehrere gleichnamige Kinder)
         elif element_type == "list" and current_depth < max_depth:
             list_tag = random_string()
             num_items = random.randint(2, 5)
-            xml += f"<{tag}>"
+            parts.append(f"<{tag}>")
             for _ in range(num_items):
-                xml += f"<{list_tag}{random_attributes()}>{random_string(random.randint(2, 8))}</{list_tag}>"
-            xml += f"</{tag}>"
+                parts.append(f"<{list_tag}{random_attributes()}>{random_string(random.randint(2, 8))}</{list_tag}>")
+            parts.append(f"</{tag}>")
 
-    xml += f"</{tag_name}>"
-    return xml
+    parts.append(f"</{tag_name}>")
 
-def generate(rows=5000):
-    data = []
+label = 1  # Label 1 = XML
 
-    for _ in range(rows):
-        xml_str = generate_nested_xml(max_depth=random.choice([1, 3]))
-        data.append((xml_str, 1))  # Label 1 = XML
+def generate_example():
+    return generate_nested_xml(max_depth=random.choice([1, 3]))
 
-    csv_path = "../synth_datasets/xml_dataset.csv"
+def generate(rows=5000, csv_path="../synth_datasets/xml_dataset.csv"):
+    # Zeilen werden direkt geschrieben, der Speicherbedarf hängt nicht von rows ab
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f, delimiter=';')
         writer.writerow(["text", "label"])
-        writer.writerows(data)
+        for _ in range(rows):
+            writer.writerow((generate_example(), label))
 
-    print(f"Datei '{csv_path}' erfolgreich erstellt ({len(data)} Beispiele).")
\ No newline at end of file
+    print(f"Datei '{csv_path}' erfolgreich erstellt ({rows} Beispiele).")
\ No newline at end of file
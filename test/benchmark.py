@@ -0,0 +1,187 @@
+"""
+Micro-Benchmarks für die Regex-Generatoren, die Dateityp-Erkennung und das Matching.
+
+Jede Funktion wird mit Eingaben wachsender Größe und Verschachtelung gemessen.
+Erfasst werden die Laufzeit (Median), die Spitzen-Allokation (tracemalloc) und
+die Länge des generierten Patterns.
+
+    python test/benchmark.py --save test/benchmark_baseline.json
+    python test/benchmark.py --compare test/benchmark_baseline.json --threshold 0.25
+
+Mit --compare endet das Skript mit Exit-Code 1, sobald ein Benchmark um mehr als
+den Schwellwert langsamer ist oder mehr Speicher belegt als die Baseline, oder sich
+die Länge des generierten Patterns geändert hat.
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import json
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+from backend import logic
+from backend.regexgenerators import build_json_regex, build_xml_regex, build_html_regex, build_csv_regex
+
+sizes = (10, 100, 1000)
+# Absolute Untergrenze, unterhalb derer Abweichungen als Messrauschen gelten
+noise_floor_seconds = 0.0002
+noise_floor_bytes = 1024
+
+
+# Eingaben #########################################
+def json_input(size: int, depth: int) -> str:
+    def level(current: int):
+        if current >= depth:
+            return {f"key{i}": i for i in range(size)}
+        return {f"key{i}": level(current + 1) if i == 0 else f"value{i}" for i in range(size)}
+    return json.dumps(level(1))
+
+
+def xml_input(size: int, depth: int) -> str:
+    children = "".join(f"<item{i} id=\"{i}\">value{i}</item{i}>" for i in range(size))
+    for current in range(depth - 1):
+        children = f"<level{current}>{children}</level{current}>"
+    return f"<root>{children}</root>"
+
+
+def html_input(size: int, depth: int) -> str:
+    children = "".join(f"<p class=\"c{i}\">text {i}</p>" for i in range(size))
+    for _ in range(depth - 1):
+        children = f"<div>{children}</div>"
+    return f"<html><body>{children}</body></html>"
+
+
+def csv_input(size: int, columns: int) -> str:
+    header = ",".join(f"col{c}" for c in range(columns))
+    rows = [",".join(str(r * columns + c) if c % 2 == 0 else f"text{r}" for c in range(columns)) for r in range(size)]
+    return "\n".join([header] + rows)
+
+
+def cases() -> list[tuple[str, Callable, str]]:
+    """(Name, Funktion, Eingabe) für alle Benchmarks."""
+    result = []
+    for size in sizes:
+        for depth in (1, 2, 3):
+            result.append((f"json_pattern[size={size},depth={depth}]", build_json_regex.json_pattern,
+                           json_input(size, depth)))
+            result.append((f"html_pattern[size={size},depth={depth}]", build_html_regex.html_pattern,
+                           html_input(size, depth)))
+        # Der XML-Generator erlaubt nur Wurzel und Kinder, daher keine weitere Verschachtelung
+        result.append((f"xml_pattern[size={size},depth=1]", build_xml_regex.xml_pattern, xml_input(size, 1)))
+        for columns in (3, 12):
+            result.append((f"csv_pattern[rows={size},columns={columns}]", build_csv_regex.csv_pattern,
+                           csv_input(size, columns)))
+
+    for size in sizes:
+        for name, text in (("json", json_input(size, 2)), ("xml", xml_input(size, 1)),
+                           ("html", html_input(size, 2)), ("csv", csv_input(size, 6))):
+            result.append((f"detect_filetype[{name},size={size}]",
+                           lambda string: logic.detect_filetype(string=string, is_ml=False), text))
+
+        for name, builder, text in (("json", build_json_regex.json_pattern, json_input(size, 2)),
+                                    ("xml", build_xml_regex.xml_pattern, xml_input(size, 1)),
+                                    ("csv", build_csv_regex.csv_pattern, csv_input(size, 6))):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                pattern = re.compile(builder(text).pattern)
+            result.append((f"match[{name},size={size}]",
+                           lambda string, pattern=pattern: logic.match(pattern, string), text))
+    return result
+
+
+# Messung ##########################################
+def measure(func: Callable, argument: str, repeat: int) -> dict:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = func(argument)  # Aufwärmen und Patternlänge
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(argument)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        func(argument)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    pattern_length = len(result.pattern) if isinstance(result, re.Pattern) else None
+    return {
+        "seconds": statistics.median(timings),
+        "peak_bytes": peak,
+        "pattern_length": pattern_length,
+        "input_length": len(argument),
+    }
+
+
+def run(repeat: int, name_filter: str | None) -> dict:
+    results = {}
+    for name, func, argument in cases():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(func, argument, repeat)
+        r = results[name]
+        print(f"{name:<45} {r['seconds'] * 1000:10.3f} ms {r['peak_bytes'] / 1024:10.1f} KiB "
+              f"pattern={r['pattern_length']}")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Liefert eine Meldung pro Regression: Laufzeit oder Spitzen-Allokation über Baseline * (1 + threshold)
+    oder eine geänderte Patternlänge (jede Änderung, auch eine kürzere, muss bewusst in die Baseline).
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base["seconds"] * (1 + threshold)
+        if result["seconds"] > limit and result["seconds"] - base["seconds"] > noise_floor_seconds:
+            regressions.append(f"{name}: {result['seconds'] * 1000:.3f} ms "
+                               f"(baseline {base['seconds'] * 1000:.3f} ms, +{threshold:.0%} allowed)")
+        limit = base["peak_bytes"] * (1 + threshold)
+        if result["peak_bytes"] > limit and result["peak_bytes"] - base["peak_bytes"] > noise_floor_bytes:
+            regressions.append(f"{name}: peak {result['peak_bytes'] / 1024:.1f} KiB "
+                               f"(baseline {base['peak_bytes'] / 1024:.1f} KiB, +{threshold:.0%} allowed)")
+        if result["pattern_length"] != base.get("pattern_length"):
+            regressions.append(f"{name}: pattern length {result['pattern_length']} "
+                               f"(baseline {base.get('pattern_length')})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for generators, detection and matching")
+    parser.add_argument("--save", help="write results as JSON baseline to this path")
+    parser.add_argument("--compare", help="compare against a JSON baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (default 0.25 = 25%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (median is reported)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this string")
+    args = parser.parse_args(argv)
+
+    results = run(repeat=args.repeat, name_filter=args.filter)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "benchmarks": results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+HTTP-Lasttest für die API mit einer Mischung aus /match, /generate und /detectfiletype.
+
+Die Request-Bodies werden entweder mit den Generatoren aus synth_datasets erzeugt
+(synthetisch) oder aus einem mitgeschnittenen Request-Log abgespielt (replay).
+Gemeldet werden Durchsatz, Latenz-Perzentile pro Route und die Fehlerrate.
+
+    python test/loadtest.py --concurrency 16 --duration 30                  # App im Prozess starten
+    python test/loadtest.py --url http://localhost:8000 --mix match=6,generate=3,detectfiletype=1
+    python test/loadtest.py --url http://localhost:8000 --replay requests.jsonl
+    python test/loadtest.py --anonymize captured.jsonl anonymized.jsonl
+
+Ein Request-Log enthält pro Zeile ein JSON-Objekt {"route": "/match", "body": {...}}.
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import http.client
+import json
+import random
+import socket
+import string
+import threading
+import time
+from urllib.parse import urlparse
+from backend import logic
+from backend.enums.FileType import FileType
+from synth_datasets import csvgenerator, htmlgenerator, xmlgenerator, jsongenerator
+
+routes = ("match", "generate", "detectfiletype")
+
+
+# Request-Bodies ###################################
+def synthetic_document(rng: random.Random) -> tuple[FileType, str]:
+    """Zufälliges Dokument eines zufälligen Typs aus den Dataset-Generatoren."""
+    # Die Generatoren verwenden das globale random-Modul
+    random.seed(rng.random())
+    filetype = rng.choice([FileType.JSON, FileType.XML, FileType.HTML, FileType.CSV])
+    match filetype:
+        case FileType.JSON:
+            text = json.dumps(jsongenerator.generate_nested_json(max_depth=rng.choice([1, 3])))
+        case FileType.XML:
+            text = xmlgenerator.generate_nested_xml(max_depth=rng.choice([1, 3]))
+        case FileType.HTML:
+            text = htmlgenerator.generate_nested_html("html", max_depth=rng.choice([2, 3]))
+        case _:
+            text = csvgenerator.generate_csv_example()
+    return filetype, text
+
+
+def synthetic_requests(count: int, mix: dict, use_ml: bool, seed: int) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    result = []
+    while len(result) < count:
+        route = rng.choices(names, weights=weights)[0]
+        filetype, text = synthetic_document(rng)
+        if route == "generate":
+            result.append(("/generate", {"filetype": filetype.name, "text": text}))
+        elif route == "detectfiletype":
+            result.append(("/detectfiletype", {"text": text, "ml": use_ml}))
+        else:
+            try:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    regex = logic.generate_regex(filetype=filetype, string=text)
+            except Exception:
+                continue
+            result.append(("/match", {"regex": regex, "text": text}))
+    return result
+
+
+def replay_requests(path: str) -> list[tuple[str, dict]]:
+    with open(path, encoding="utf-8") as f:
+        # Leerzeilen überspringen wie in anonymize_log
+        return [(entry["route"], entry["body"]) for entry in (json.loads(line) for line in f if line.strip())]
+
+
+def anonymize_text(text: str, rng: random.Random) -> str:
+    """Ersetzt Buchstaben und Ziffern zufällig, Struktur (Satz- und Trennzeichen, Länge) bleibt erhalten."""
+    chars = []
+    for c in text:
+        if c.isdigit():
+            chars.append(rng.choice(string.digits))
+        elif c.isalpha():
+            chars.append(rng.choice(string.ascii_uppercase if c.isupper() else string.ascii_lowercase))
+        else:
+            chars.append(c)
+    return "".join(chars)
+
+
+def anonymize_log(source: str, target: str, seed: int):
+    """Anonymisiert die Texte eines Request-Logs. Regexe und Steuerfelder bleiben unverändert."""
+    rng = random.Random(seed)
+    with open(source, encoding="utf-8") as f_in, open(target, "w", encoding="utf-8") as f_out:
+        for line in f_in:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = entry.get("body", {})
+            if isinstance(body.get("text"), str):
+                body["text"] = anonymize_text(body["text"], rng)
+            if isinstance(body.get("texts"), list):
+                body["texts"] = [anonymize_text(t, rng) if isinstance(t, str) else t for t in body["texts"]]
+            f_out.write(json.dumps(entry) + "\n")
+
+
+# Lastgenerierung ##################################
+def start_in_process() -> tuple[str, object]:
+    """Startet die App in einem Hintergrund-Thread auf einem freien Port."""
+    import uvicorn
+    import main
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}{main.api_endpoint}", server
+
+
+def connect(host: str, port: int) -> http.client.HTTPConnection:
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    connection.connect()
+    # Header und Body werden getrennt gesendet, ohne TCP_NODELAY kostet das ~40ms pro Anfrage
+    connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return connection
+
+
+def run_load(base_url: str, requests: list[tuple[str, dict]], concurrency: int, duration: float) -> dict:
+    parsed = urlparse(base_url)
+    bodies = [(route, json.dumps(body).encode("utf-8")) for route, body in requests]
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset: int):
+        connection = connect(parsed.hostname, parsed.port or 80)
+        local_samples: dict[str, list[float]] = {}
+        local_errors: dict[str, int] = {}
+        index = offset
+        while time.monotonic() < deadline:
+            route, body = bodies[index % len(bodies)]
+            index += concurrency
+            start = time.perf_counter()
+            try:
+                connection.request("POST", parsed.path + route, body=body,
+                                   headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                failed = response.status >= 400
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = connect(parsed.hostname, parsed.port or 80)
+                failed = True
+            local_samples.setdefault(route, []).append(time.perf_counter() - start)
+            if failed:
+                local_errors[route] = local_errors.get(route, 0) + 1
+        connection.close()
+        with lock:
+            for route, values in local_samples.items():
+                samples.setdefault(route, []).extend(values)
+            for route, count in local_errors.items():
+                errors[route] = errors.get(route, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return report(samples, errors, time.monotonic() - started)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def report(samples: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> dict:
+    result = {"elapsed_seconds": round(elapsed, 3), "routes": {}}
+    total = 0
+    total_errors = 0
+    for route, values in sorted(samples.items()):
+        values.sort()
+        total += len(values)
+        total_errors += errors.get(route, 0)
+        result["routes"][route] = {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "error_rate": round(errors.get(route, 0) / len(values), 4),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p90_ms": round(percentile(values, 90) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+    result["requests"] = total
+    result["throughput_rps"] = round(total / elapsed, 2) if elapsed > 0 else 0.0
+    result["error_rate"] = round(total_errors / total, 4) if total else 0.0
+    return result
+
+
+def print_report(result: dict):
+    print(f"{'route':<18}{'requests':>10}{'rps':>10}{'errors':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for route, r in result["routes"].items():
+        print(f"{route:<18}{r['requests']:>10}{r['throughput_rps']:>10.1f}{r['error_rate']:>9.2%}"
+              f"{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}")
+    print(f"Total: {result['requests']} requests in {result['elapsed_seconds']}s, "
+          f"{result['throughput_rps']} req/s, error rate {result['error_rate']:.2%}")
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in routes:
+            raise argparse.ArgumentTypeError(f"Unknown route \"{name}\", expected one of {routes}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP load test for the regex generator API")
+    parser.add_argument("--url", help="base URL including the endpoint prefix; starts the app in-process if omitted")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("match=5,generate=3,detectfiletype=2"),
+                        help="route weights, e.g. match=5,generate=3,detectfiletype=2")
+    parser.add_argument("--ml", action="store_true", help="send ml=true to /detectfiletype")
+    parser.add_argument("--requests", type=int, default=500, help="number of distinct synthetic request bodies")
+    parser.add_argument("--replay", help="replay a request log (JSON lines) instead of synthetic requests")
+    parser.add_argument("--anonymize", nargs=2, metavar=("SOURCE", "TARGET"), help="anonymize a request log and exit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.anonymize:
+        anonymize_log(args.anonymize[0], args.anonymize[1], seed=args.seed)
+        print(f"Wrote anonymized log to {args.anonymize[1]}")
+        return 0
+
+    if args.replay:
+        requests = replay_requests(args.replay)
+    else:
+        requests = synthetic_requests(args.requests, args.mix, use_ml=args.ml, seed=args.seed)
+    if not requests:
+        print("No requests to send")
+        return 1
+
+    server = None
+    base_url = args.url.rstrip("/") if args.url else None
+    if base_url is None:
+        base_url, server = start_in_process()
+
+    result = run_load(base_url, requests, concurrency=args.concurrency, duration=args.duration)
+    if server is not None:
+        server.should_exit = True
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import asyncio
+from backend.admission import AdmissionLimiter
+
+
+class TestAdmissionLimiter:
+    def test_rejects_when_queue_is_full_and_times_out(self):
+        async def scenario():
+            limiter = AdmissionLimiter(max_concurrency=1, max_queue=1, max_wait=0.05)
+            assert await limiter.acquire() is True
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            # Ein Platz belegt, einer wartet: die nächste Anfrage wird sofort abgewiesen
+            assert await limiter.acquire() is False
+            assert await waiter is False
+            limiter.release()
+            assert await limiter.acquire() is True
+            assert limiter.waiting == 0 and limiter.active == 1
+
+        asyncio.run(scenario())
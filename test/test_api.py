@@ -57,6 +57,12 @@ class TestMatch:
             # Für den unwahrscheinlichen Fall, dass der Test-Regex nicht kompiliert.
             pytest.fail(f"Regex-Kompilierungsfehler für '{regex_str}': {e}")
 
+    def test_match_many_reports_errors_per_item(self):
+        regex = re.compile(r"\d+")
+        results, errors = logic.match_many(regex, ["123", "abc", None, ""])
+        assert results == [True, False, None, False]
+        assert errors == [{"index": 2, "message": "Text is not a string"}]
+
 
 # ============================================================
 # Tests für logic.generate_regex - Fokus: Strukturprüfung
@@ -226,6 +232,17 @@ class TestDetectFiletype:
         assert isinstance(result, dict)
         assert any(FileType.UNSUPPORTED.name.lower() == k.lower() for k in result.keys())
 
+    @pytest.mark.parametrize("text,expected", [
+        ('{"key": "value"}', [FileType.JSON]),
+        ("<root><item/></root>", [FileType.XML]),
+        ("<html><body></body></html>", [FileType.HTML]),
+        ("col1;col2\n1;2", [FileType.CSV]),
+        ("   ", []),
+        ("just some text", []),
+    ])
+    def test_matching_filetypes(self, text, expected):
+        assert logic.matching_filetypes(text) == expected
+
     # Die ML-Mock-Tests sind im Original bereits gut und werden hier ausgelassen.
 
 # ============================================================
@@ -0,0 +1,49 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import threading
+import pytest
+
+np = pytest.importorskip("numpy")
+from ml.batching import BatchScheduler
+
+
+class TestBatchScheduler:
+    def test_concurrent_requests_share_one_forward_pass(self):
+        calls = []
+
+        def forward(chunks):
+            calls.append(list(chunks))
+            return np.array([[float(len(chunk))] for chunk in chunks])
+
+        scheduler = BatchScheduler(forward=forward, max_batch=8, window=0.2)
+        results = {}
+
+        def submit(name, chunks):
+            results[name] = scheduler.submit(chunks)
+
+        threads = [threading.Thread(target=submit, args=("a", ["x", "xx"])),
+                   threading.Thread(target=submit, args=("b", ["xxx"]))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1 and sorted(calls[0]) == ["x", "xx", "xxx"]
+        assert results["a"].ravel().tolist() == [1.0, 2.0]
+        assert results["b"].ravel().tolist() == [3.0]
+
+    def test_requests_exceeding_max_batch_are_split(self):
+        calls = []
+
+        def forward(chunks):
+            calls.append(len(chunks))
+            return np.zeros((len(chunks), 1))
+
+        scheduler = BatchScheduler(forward=forward, max_batch=2, window=0.05)
+        threads = [threading.Thread(target=scheduler.submit, args=(["a", "b"],)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert calls == [2, 2, 2]
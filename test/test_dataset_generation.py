@@ -0,0 +1,35 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import csv
+import pytest
+from synth_datasets import dataset_central_generator
+
+
+class TestDatasetGeneration:
+    def test_shards_are_reproducible_independent_of_workers(self, tmp_path):
+        first = dataset_central_generator.generate_datasets(400, workers=2, out_dir=str(tmp_path / "a"), rows_per_shard=40, fmt="csv")
+        second = dataset_central_generator.generate_datasets(400, workers=1, out_dir=str(tmp_path / "b"), rows_per_shard=40, fmt="csv")
+        assert len(first) == len(second) == 12
+        for a, b in zip(first, second):
+            with open(a, encoding="utf-8") as fa, open(b, encoding="utf-8") as fb:
+                assert fa.read() == fb.read()
+
+        with open(first[0], newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f, delimiter=";"))
+        assert len(rows) == 40 and rows[0]["label"] == "2"
+        assert dataset_central_generator.is_complete(str(tmp_path / "a"))
+
+    def test_incomplete_run_is_detected(self, tmp_path):
+        dataset_central_generator.generate_datasets(80, workers=1, out_dir=str(tmp_path), rows_per_shard=10, fmt="csv")
+        os.remove(tmp_path / "xml_dataset-00001.csv")
+        assert not dataset_central_generator.is_complete(str(tmp_path))
+
+    def test_arrow_shards_are_listed_and_readable(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        shards = dataset_central_generator.generate_datasets(80, workers=1, out_dir=str(tmp_path), rows_per_shard=10,
+                                                             fmt="arrow")
+        assert [str(f) for f in dataset_central_generator.dataset_files(str(tmp_path))] == shards
+        with pa.memory_map(shards[0]) as source:
+            table = pa.ipc.open_stream(source).read_all()
+        assert table.num_rows == 10 and table.column("label").to_pylist() == [2] * 10
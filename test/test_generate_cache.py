@@ -0,0 +1,66 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import hashlib
+import pytest
+from backend import generate_cache, logic
+from backend.enums.FileType import FileType as ft
+from backend.lru_cache import LRUCache
+
+
+class TestGenerateCache:
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch):
+        cache = LRUCache(max_entries=16, max_bytes=1024, sizeof=getattr(generate_cache, "__regex_size"))
+        monkeypatch.setattr(generate_cache, "__cache", cache)
+        monkeypatch.setattr(generate_cache, "enabled", True)
+        return cache
+
+    def test_key_is_filetype_and_text_hash(self, cache):
+        text = '{"name": "Anna"}'
+        regex = generate_cache.generate_regex(ft.JSON, text)
+        assert regex == logic.generate_regex(filetype=ft.JSON, string=text)
+        assert (ft.JSON, hashlib.sha256(text.encode("utf-8")).hexdigest()) in cache
+
+    def test_counts_hits_and_misses(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(logic, "generate_regex", lambda filetype, string: calls.append(filetype) or "^x$")
+        generate_cache.generate_regex(ft.JSON, "{}")
+        generate_cache.generate_regex(ft.JSON, "{}")
+        # Gleicher Text, anderer Dateityp ist ein eigener Eintrag
+        generate_cache.generate_regex(ft.XML, "{}")
+        assert calls == [ft.JSON, ft.XML]
+        stats = generate_cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 2
+
+    def test_size_is_counted_in_utf8_bytes(self):
+        regex = generate_cache.generate_regex(ft.JSON, '{"größe": 1}')
+        assert generate_cache.stats()["bytes"] == len(regex.encode("utf-8")) > len(regex)
+
+    def test_disabling_flushes_the_cache(self, cache):
+        generate_cache.generate_regex(ft.JSON, "{}")
+        generate_cache.set_enabled(False)
+        assert len(cache) == 0
+        generate_cache.generate_regex(ft.JSON, "{}")
+        assert len(cache) == 0
+
+    def test_flush_removes_all_entries(self, cache):
+        generate_cache.generate_regex(ft.JSON, "{}")
+        generate_cache.generate_regex(ft.CSV, "a;b")
+        generate_cache.flush()
+        assert len(cache) == 0 and generate_cache.stats()["bytes"] == 0
+
+    def test_shared_dir_passes_disable_and_flush_to_other_workers(self, cache, monkeypatch, tmp_path):
+        monkeypatch.setattr(generate_cache, "shared_dir", str(tmp_path))
+        monkeypatch.setattr(generate_cache, "__control_mtime", None)
+        monkeypatch.setattr(generate_cache, "__generation", 0)
+        generate_cache.generate_regex(ft.JSON, "{}")
+        # Ein anderer Prozess leert den Cache
+        (tmp_path / "generate_cache.json").write_text('{"enabled": true, "generation": 1}', encoding="utf-8")
+        generate_cache.generate_regex(ft.CSV, "a;b")
+        assert len(cache) == 1 and generate_cache.stats()["misses"] == 2
+        # ... und schaltet ihn ab
+        (tmp_path / "generate_cache.json").write_text('{"enabled": false, "generation": 1}', encoding="utf-8")
+        os.utime(tmp_path / "generate_cache.json", ns=(1, 1))
+        assert generate_cache.stats()["enabled"] is False
+        assert len(cache) == 0
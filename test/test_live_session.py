@@ -0,0 +1,24 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import re
+import pytest
+from backend.live_session import LiveSession
+
+
+class TestLiveSession:
+    def test_only_latest_update_is_evaluated(self):
+        session = LiveSession()
+        session.set_pattern(re.compile(r"\d+"))
+        session.apply({"type": "text", "text": "12", "seq": 1})
+        session.apply({"type": "edit", "start": 2, "end": 2, "text": "3", "seq": 2})
+        session.apply({"type": "edit", "start": 0, "end": 1, "text": "9", "seq": 3})
+
+        pattern, text, seq = session.take()
+        assert (text, seq) == ("923", 3)
+        assert session.take() is None
+
+    def test_invalid_edit_range_is_rejected(self):
+        session = LiveSession()
+        with pytest.raises(ValueError):
+            session.apply({"type": "edit", "start": 5, "end": 6, "text": "x"})
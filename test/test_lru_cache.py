@@ -0,0 +1,35 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.lru_cache import LRUCache
+
+
+class TestLRUCache:
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_lru_respects_byte_limit(self):
+        cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.put("c", "123")
+        assert "a" not in cache
+        assert cache.stats()["bytes"] == 8
+        cache.put("d", "x" * 11)
+        assert "d" not in cache
+
+    def test_lru_expires_entries_after_ttl(self):
+        cache = LRUCache(max_entries=10, ttl=0.05)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        time.sleep(0.06)
+        assert "a" not in cache
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1 and len(cache) == 0
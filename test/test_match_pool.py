@@ -0,0 +1,90 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import re
+import threading
+import time
+import pytest
+from backend import match_pool
+from backend.match_pool import MatchPool, MatchPoolBusyError, MatchTimeoutError
+
+
+class TestMatchPool:
+    @pytest.fixture
+    def pool(self):
+        pool = MatchPool(size=1, timeout=0.5)
+        yield pool
+        pool.close()
+
+    def test_fullmatch_in_worker(self, pool):
+        assert pool.fullmatch(re.compile(r"\d+"), "12345") is True
+        assert pool.fullmatch(re.compile(r"\d+"), "12a45") is False
+
+    def test_catastrophic_backtracking_times_out_and_recycles_worker(self, pool):
+        evil = re.compile(r"(a+)+$")
+        with pytest.raises(MatchTimeoutError):
+            pool.fullmatch(evil, "a" * 40 + "b")
+
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["recycled_workers"] == 1
+        # Der ersetzte Worker muss wieder normal arbeiten
+        assert pool.fullmatch(re.compile(r"a+"), "aaa") is True
+
+    def test_waiting_for_a_worker_is_not_counted_as_timeout(self):
+        pool = MatchPool(size=1, timeout=0.5, queue_timeout=5.0)
+        try:
+            evil = re.compile(r"(a+)+$")
+            errors = []
+
+            def run_evil():
+                try:
+                    pool.fullmatch(evil, "a" * 40 + "b")
+                except MatchTimeoutError as e:
+                    errors.append(e)
+
+            blocker = threading.Thread(target=run_evil)
+            blocker.start()
+            # Wartet hinter dem katastrophalen Pattern, das eigene Budget beginnt erst mit dem Worker
+            while pool._idle.qsize() > 0:
+                time.sleep(0.01)
+            assert pool.fullmatch(re.compile(r"\d+"), "12345") is True
+            blocker.join()
+            assert len(errors) == 1
+            stats = pool.stats()
+            assert stats["timeouts"] == 1
+            assert list(stats["timeouts_by_pattern"].values()) == [1]
+        finally:
+            pool.close()
+
+    def test_saturated_pool_raises_busy_without_blaming_the_pattern(self):
+        pool = MatchPool(size=1, timeout=2.0, queue_timeout=0.1)
+        try:
+            worker = pool._idle.get()
+            with pytest.raises(MatchPoolBusyError):
+                pool.fullmatch(re.compile(r"a+"), "aaa")
+            pool._idle.put(worker)
+            stats = pool.stats()
+            assert stats["saturated"] == 1
+            assert stats["timeouts"] == 0
+            assert stats["timeouts_by_pattern"] == {}
+        finally:
+            pool.close()
+
+    def test_batch_fails_remaining_items_after_first_timeout(self, pool):
+        evil = re.compile(r"(a+)+$")
+        texts = ["aaa", "a" * 40 + "b", "a" * 40 + "b", "a" * 40 + "b"]
+        results, errors = pool.fullmatch_many(evil, texts)
+        assert results == [True, None, None, None]
+        assert [error["index"] for error in errors] == [1, 2, 3]
+        assert "time budget" in errors[0]["message"]
+        # Nur ein Timeout, nicht einer pro übrigem Eintrag
+        assert pool.stats()["timeouts"] == 1
+        assert pool.fullmatch(re.compile(r"a+"), "aaa") is True
+
+    def test_match_many_maps_invalid_items_back_to_their_index(self, monkeypatch, pool):
+        monkeypatch.setattr(match_pool, "match_mode", "isolated")
+        monkeypatch.setattr(match_pool, "start", lambda: pool)
+        results, errors = match_pool.match_many(re.compile(r"\d+"), ["123", None, "", "abc"])
+        assert results == [True, None, False, False]
+        assert errors == [{"index": 1, "message": "Text is not a string"}]
@@ -0,0 +1,47 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from backend import metrics
+
+
+class TestMetrics:
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = metrics.Histogram("test_histogram_seconds", "Test histogram", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5.0, stage="a")
+
+        text = metrics.render()
+        assert 'test_histogram_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 'test_histogram_seconds_bucket{stage="a",le="1.0"} 2' in text
+        assert 'test_histogram_seconds_bucket{stage="a",le="+Inf"} 3' in text
+        assert 'test_histogram_seconds_count{stage="a"} 3' in text
+
+    def test_generate_regex_records_stage_and_pattern_size(self):
+        from backend import logic
+        from backend.enums.FileType import FileType
+
+        logic.generate_regex(filetype=FileType.JSON, string='{"a": 1}')
+        text = metrics.render()
+        assert 'regexgen_stage_duration_seconds_count{stage="build_json_regex"}' in text
+        assert 'regexgen_generated_pattern_bytes_count{filetype="JSON"}' in text
+
+    def test_shared_dir_merges_workers_with_worker_label(self, monkeypatch, tmp_path):
+        counter = metrics.Counter("test_shared_total", "Test counter", ("kind",))
+        monkeypatch.setattr(metrics, "shared_dir", str(tmp_path))
+        monkeypatch.setattr(metrics, "worker", "0")
+        counter.inc(kind="a")
+        metrics.publish()
+        # Zweiter Prozess mit eigenem Zählerstand
+        monkeypatch.setattr(metrics, "worker", "1")
+        counter.inc(kind="a")
+
+        text = metrics.render()
+        assert 'test_shared_total{kind="a",worker="0"} 1' in text
+        assert 'test_shared_total{kind="a",worker="1"} 2' in text
+        assert text.count("# TYPE test_shared_total counter") == 1
+
+    def test_metric_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            metrics._Metric("test_abstract", "Abstract metric")
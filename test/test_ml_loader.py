@@ -0,0 +1,171 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import functools
+import pytest
+import threading
+import time
+from types import SimpleNamespace
+from backend import ml_loader
+
+
+class TestWarmup:
+    def test_records_cold_and_warm_timings_per_input(self, monkeypatch):
+        calls = []
+
+        def warmup_inputs(texts, lengths, batch_sizes):
+            assert len(texts) == 4
+            for length in lengths:
+                for batch_size in batch_sizes:
+                    yield {"tokens": length, "batch_size": batch_size}, functools.partial(calls.append, length)
+
+        monkeypatch.setattr(ml_loader, "get_default", lambda: SimpleNamespace(warmup_inputs=warmup_inputs))
+        monkeypatch.setattr(ml_loader, "warmup_lengths", [64, 512])
+        monkeypatch.setattr(ml_loader, "warmup_batch_sizes", [1, 4])
+        monkeypatch.setattr(ml_loader, "warmup_rounds", 3)
+
+        report = ml_loader.warmup()
+        assert len(report["runs"]) == 4 and len(calls) == 12
+        assert {"tokens", "batch_size", "cold_ms", "warm_ms"} <= set(report["runs"][0])
+        assert ml_loader.timings()["warmup"] == report
+
+
+class TestBackgroundLoading:
+    def test_state_moves_from_loading_to_ready(self, monkeypatch):
+        release = threading.Event()
+        monkeypatch.setattr(ml_loader, "get_ngram", lambda: release.wait(5))
+        assert ml_loader.state("ngram") == "not_loaded"
+
+        assert ml_loader.ensure_loading("ngram") == "loading"
+        assert ml_loader.ensure_loading("ngram") == "loading"
+        release.set()
+        deadline = time.monotonic() + 5
+        while ml_loader.state("ngram") == "loading" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ml_loader.states()["ngram"] == {"state": "ready", "error": None}
+
+    @staticmethod
+    def reset_states(monkeypatch):
+        monkeypatch.setattr(ml_loader, "__states", {name: "not_loaded" for name in ml_loader.models})
+        monkeypatch.setattr(ml_loader, "__errors", {name: None for name in ml_loader.models})
+        monkeypatch.setattr(ml_loader, "__retry_at", {name: None for name in ml_loader.models})
+
+    def test_failed_load_is_retried(self, monkeypatch):
+        self.reset_states(monkeypatch)
+        monkeypatch.setattr(ml_loader, "load_retry_seconds", 0.05)
+        attempts = []
+
+        def get_ngram():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("model file is still being written")
+
+        monkeypatch.setattr(ml_loader, "get_ngram", get_ngram)
+        ml_loader.ensure_loading("ngram")
+        deadline = time.monotonic() + 5
+        while ml_loader.state("ngram") != "ready" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(attempts) == 2
+        assert ml_loader.states()["ngram"] == {"state": "ready", "error": None}
+
+    def test_missing_dependency_is_final(self, monkeypatch):
+        self.reset_states(monkeypatch)
+        monkeypatch.setattr(ml_loader, "load_retry_seconds", 0.05)
+
+        def get_ngram():
+            raise ImportError("No module named 'numpy'")
+
+        monkeypatch.setattr(ml_loader, "get_ngram", get_ngram)
+        ml_loader.ensure_loading("ngram")
+        deadline = time.monotonic() + 5
+        while ml_loader.state("ngram") == "loading" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ml_loader.state("ngram") == "failed"
+        assert ml_loader.retry_after("ngram") is None
+
+    def test_defer_to_master_reports_loading_without_loading(self, monkeypatch):
+        self.reset_states(monkeypatch)
+        monkeypatch.setattr(ml_loader, "get_default", lambda: pytest.fail("the worker must not load"))
+        monkeypatch.setattr(ml_loader, "get_transformer", lambda: pytest.fail("the worker must not load"))
+        monkeypatch.setattr(ml_loader, "get_ngram", lambda: pytest.fail("the worker must not load"))
+        ml_loader.defer_to_master()
+        assert ml_loader.ensure_loading() == "loading"
+        assert ml_loader.retry_after() == 5
+
+    def test_unavailable_model_is_final(self, monkeypatch):
+        self.reset_states(monkeypatch)
+        monkeypatch.setattr(ml_loader, "load_retry_seconds", 0.05)
+
+        def get_ngram():
+            raise ml_loader.ModelUnavailableError("Offline mode: no local model found")
+
+        monkeypatch.setattr(ml_loader, "get_ngram", get_ngram)
+        ml_loader.ensure_loading("ngram")
+        deadline = time.monotonic() + 5
+        while ml_loader.state("ngram") == "loading" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ml_loader.state("ngram") == "failed"
+        assert ml_loader.retry_after("ngram") is None
+
+    def test_retries_are_capped(self, monkeypatch):
+        self.reset_states(monkeypatch)
+        monkeypatch.setattr(ml_loader, "load_retry_seconds", 0.01)
+        monkeypatch.setattr(ml_loader, "load_retries", 2)
+        attempts = []
+
+        def get_ngram():
+            attempts.append(1)
+            raise RuntimeError("still broken")
+
+        monkeypatch.setattr(ml_loader, "get_ngram", get_ngram)
+        ml_loader.ensure_loading("ngram")
+        deadline = time.monotonic() + 5
+        while ml_loader.retry_after("ngram") is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ml_loader.state("ngram") == "failed"
+        assert len(attempts) == 3
+
+
+class TestReadiness:
+    def test_on_demand_load_does_not_affect_readiness(self, monkeypatch):
+        monkeypatch.setattr(ml_loader, "preload", False)
+        monkeypatch.setattr(ml_loader, "warmup_enabled", False)
+        monkeypatch.setattr(ml_loader, "__states", {name: "failed" for name in ml_loader.models})
+        assert ml_loader.is_ready()
+
+    def test_preload_gates_readiness_on_default_model(self, monkeypatch):
+        monkeypatch.setattr(ml_loader, "preload", True)
+        monkeypatch.setattr(ml_loader, "__states", {name: "loading" for name in ml_loader.models})
+        assert not ml_loader.is_ready()
+        monkeypatch.setattr(ml_loader, "__states", {name: "ready" for name in ml_loader.models})
+        assert ml_loader.is_ready()
+
+
+class TestModelLocks:
+    def test_ngram_loads_while_transformer_is_loading(self, monkeypatch):
+        import importlib
+        started = threading.Event()
+        release = threading.Event()
+
+        def prepare_model(allow_training=True):
+            started.set()
+            release.wait(5)
+
+        modules = {"ml.transformer": SimpleNamespace(prepare_model=prepare_model),
+                   "ml.ngram_classifier": SimpleNamespace(load=lambda: None)}
+        monkeypatch.setattr(importlib, "import_module", modules.__getitem__)
+        monkeypatch.setattr(ml_loader, "__transformer", None)
+        monkeypatch.setattr(ml_loader, "__ngram", None)
+
+        loader = threading.Thread(target=ml_loader.get_transformer)
+        loader.start()
+        try:
+            assert started.wait(5)
+            ngram = []
+            thread = threading.Thread(target=lambda: ngram.append(ml_loader.get_ngram()))
+            thread.start()
+            thread.join(1)
+            assert ngram == [modules["ml.ngram_classifier"]]
+        finally:
+            release.set()
+            loader.join(5)
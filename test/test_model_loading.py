@@ -0,0 +1,52 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+transformer = pytest.importorskip("ml.transformer")
+from backend.ml_loader import ModelUnavailableError
+
+
+class _StubModel:
+    def eval(self):
+        return self
+
+    def state_dict(self):
+        return {}
+
+
+class TestModelLoading:
+    @pytest.fixture(autouse=True)
+    def no_hub(self, monkeypatch):
+        def hf_api():
+            pytest.fail("the hugging face hub must not be contacted")
+
+        monkeypatch.setattr(transformer, "HfApi", hf_api)
+        monkeypatch.setattr(transformer, "model_dir", "/models/distilbert")
+
+    def test_offline_without_local_model_fails_fast(self, monkeypatch):
+        monkeypatch.setattr(transformer, "__is_local_model_available", lambda: False)
+        monkeypatch.setattr(transformer, "offline", True)
+        with pytest.raises(ModelUnavailableError, match="Offline mode"):
+            transformer.prepare_model()
+
+    def test_local_model_is_loaded_without_network(self, monkeypatch):
+        calls = []
+
+        def from_pretrained(name, **kwargs):
+            calls.append((name, kwargs.get("local_files_only")))
+            return _StubModel()
+
+        monkeypatch.setattr(transformer, "__is_local_model_available", lambda: True)
+        monkeypatch.setattr(transformer, "offline", True)
+        monkeypatch.setattr(transformer.DistilBertTokenizerFast, "from_pretrained", from_pretrained)
+        monkeypatch.setattr(transformer.DistilBertForSequenceClassification, "from_pretrained", from_pretrained)
+        monkeypatch.setattr(transformer, "tokenizer", None, raising=False)
+        monkeypatch.setattr(transformer, "model", None, raising=False)
+        monkeypatch.setattr(transformer, "model_fingerprint", None)
+        monkeypatch.setattr(transformer, "backend_ready", True)
+        transformer.prepare_model()
+        assert calls == [("/models/distilbert", True), ("/models/distilbert", True)]
+        assert transformer.model_fingerprint is not None
+        # Das Backend wird erst im Worker gewählt
+        assert transformer.backend_ready is False
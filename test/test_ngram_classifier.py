@@ -0,0 +1,42 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import json
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+from ml import ngram_classifier
+from synth_datasets import csvgenerator, htmlgenerator, xmlgenerator, jsongenerator
+
+
+def examples(count: int) -> list:
+    random.seed(0)
+    rows = []
+    for _ in range(count):
+        rows.append((json.dumps(jsongenerator.generate_nested_json(max_depth=3)), 0))
+        rows.append((xmlgenerator.generate_nested_xml(max_depth=3), 1))
+        rows.append((csvgenerator.generate_csv_example(), 2))
+        rows.append((htmlgenerator.generate_nested_html("html", max_depth=3), 3))
+    return rows
+
+
+class TestNgramClassifier:
+    def test_features_are_fixed_size_and_normalized(self):
+        short = ngram_classifier.features("a,b\n1,2", bits=10)
+        long = ngram_classifier.features("<root>" + "<item/>" * 5000 + "</root>", bits=10)
+        assert short.shape == long.shape == ((1 << 10) + ngram_classifier.n_structure,)
+        assert np.isclose(np.linalg.norm(long[:1 << 10]), 1.0)
+
+    def test_trained_model_separates_filetypes_without_torch(self, tmp_path):
+        rows = examples(60)
+        w, b = ngram_classifier.train(rows[:160], epochs=5, bits=10)
+        ngram_classifier.save(w, b, str(tmp_path / "ngram.npz"))
+        ngram_classifier.load(str(tmp_path / "ngram.npz"))
+
+        correct = 0
+        for text, label in rows[160:]:
+            probs = ngram_classifier.predict(text)
+            correct += max(probs, key=probs.get) == ["JSON", "XML", "CSV", "HTML"][label]
+        assert correct / len(rows[160:]) >= 0.9
+        assert "torch" not in sys.modules
@@ -0,0 +1,56 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+transformer = pytest.importorskip("ml.transformer")
+from ml import onnx_backend
+
+torch_probs = np.array([[0.9, 0.05, 0.03, 0.02]])
+
+
+class _StubClassifier:
+    logits_value = np.log(torch_probs)
+
+    def __init__(self, path, threads=1):
+        self.path = path
+
+    def logits(self, input_ids, attention_mask):
+        return np.repeat(self.logits_value, len(input_ids), axis=0)
+
+
+class TestPrepareOnnx:
+    @pytest.fixture
+    def stubbed(self, monkeypatch, tmp_path):
+        (tmp_path / onnx_backend.int8_name).write_bytes(b"")
+        monkeypatch.setattr(transformer, "onnx_dir", str(tmp_path))
+        monkeypatch.setattr(transformer, "model", object(), raising=False)
+        monkeypatch.setattr(transformer, "onnx_classifier", None)
+        monkeypatch.setattr(onnx_backend, "OnnxClassifier", _StubClassifier)
+        monkeypatch.setattr(transformer, "__chunk_text", lambda text: [[101, 7, 102]])
+        monkeypatch.setattr(transformer, "__pad", lambda chunks, return_tensors: {
+            "input_ids": np.array(chunks), "attention_mask": np.ones((len(chunks), len(chunks[0])))})
+        monkeypatch.setattr(transformer, "__forward_torch",
+                            lambda chunks: np.repeat(torch_probs, len(chunks), axis=0))
+        return getattr(transformer, "__prepare_onnx")
+
+    def test_matching_logits_use_onnx(self, stubbed, monkeypatch):
+        monkeypatch.setattr(transformer, "inference_backend", "auto")
+        stubbed()
+        assert isinstance(transformer.onnx_classifier, _StubClassifier)
+        assert transformer.model is None
+
+    def test_diverging_logits_fall_back_to_torch_in_auto_mode(self, stubbed, monkeypatch):
+        monkeypatch.setattr(transformer, "inference_backend", "auto")
+        monkeypatch.setattr(_StubClassifier, "logits_value", np.log(np.array([[0.02, 0.03, 0.05, 0.9]])))
+        stubbed()
+        assert transformer.onnx_classifier is None
+        assert transformer.model is not None
+
+    def test_diverging_logits_raise_in_onnx_mode(self, stubbed, monkeypatch):
+        monkeypatch.setattr(transformer, "inference_backend", "onnx")
+        monkeypatch.setattr(_StubClassifier, "logits_value", np.log(np.array([[0.02, 0.03, 0.05, 0.9]])))
+        with pytest.raises(RuntimeError, match="parity check failed"):
+            stubbed()
+        assert transformer.onnx_classifier is None
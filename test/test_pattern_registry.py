@@ -0,0 +1,43 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend import pattern_registry
+from backend.lru_cache import LRUCache
+
+
+class TestPatternRegistry:
+    def test_register_returns_stable_content_hash(self):
+        first = pattern_registry.register(r"^\d+$")
+        second = pattern_registry.register(r"^\d+$")
+        assert first == second == pattern_registry.pattern_id(r"^\d+$")
+        assert pattern_registry.get(first).fullmatch("123")
+
+    def test_unknown_id_returns_none(self):
+        assert pattern_registry.get("does-not-exist") is None
+
+    def test_store_dir_shares_ids_between_processes(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(pattern_registry, "store_dir", str(tmp_path))
+        pid = pattern_registry.register(r"^[a-z]+-\d+$")
+        # Ein anderer Prozess hat eine leere Registry, kennt die ID aber über den Ablageort
+        monkeypatch.setattr(pattern_registry, "__registry", LRUCache(max_entries=4))
+        assert pattern_registry.get(pid).fullmatch("abc-12")
+
+    def test_store_dir_only_accepts_pattern_ids(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(pattern_registry, "store_dir", str(tmp_path / "store"))
+        (tmp_path / "secret.re").write_text("x", encoding="utf-8")
+        assert pattern_registry.get("../secret") is None
+        # Inhalt passt nicht zur ID
+        (tmp_path / "store").mkdir()
+        forged = "0" * 64
+        (tmp_path / "store" / f"{forged}.re").write_text("x", encoding="utf-8")
+        assert pattern_registry.get(forged) is None
+
+    def test_store_is_bounded_by_store_size(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(pattern_registry, "store_dir", str(tmp_path))
+        monkeypatch.setattr(pattern_registry, "store_size", 2)
+        first = pattern_registry.register(r"^store-1$")
+        os.utime(tmp_path / f"{first}.re", (1, 1))
+        pattern_registry.register(r"^store-2$")
+        pattern_registry.register(r"^store-3$")
+        files = sorted(path.name for path in tmp_path.glob("*.re"))
+        assert len(files) == 2 and f"{first}.re" not in files
@@ -0,0 +1,38 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from ml import prediction_cache
+from backend.lru_cache import LRUCache
+
+
+class TestPredictionCache:
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch):
+        cache = LRUCache(max_entries=16)
+        monkeypatch.setattr(prediction_cache, "__cache", cache)
+        monkeypatch.setattr(prediction_cache, "enabled", True)
+        monkeypatch.setattr(prediction_cache, "model_version", None)
+        return cache
+
+    def test_new_model_version_drops_entries(self):
+        probs = np.array([0.7, 0.1, 0.1, 0.1])
+        prediction_cache.set_model_version("a:torch")
+        prediction_cache.put([[101, 7, 102]], probs)
+        # Gleiche Version (z.B. erneutes Laden desselben Modells) behält die Einträge
+        prediction_cache.set_model_version("a:torch")
+        assert prediction_cache.get([[101, 7, 102]]) is probs
+        prediction_cache.set_model_version("a:onnx")
+        assert prediction_cache.get([[101, 7, 102]]) is None
+        assert prediction_cache.stats()["entries"] == 0
+
+    def test_nothing_is_cached_without_model_version(self):
+        prediction_cache.put([[101, 102]], np.zeros(4))
+        assert prediction_cache.get([[101, 102]]) is None
+
+    def test_chunks_key_separates_chunk_boundaries(self):
+        assert prediction_cache.chunks_key([[1, 2], [3]]) != prediction_cache.chunks_key([[1], [2, 3]])
+        assert prediction_cache.chunks_key([[1, 2, 3]]) != prediction_cache.chunks_key([[1, 2], [3]])
+        assert prediction_cache.chunks_key([[1, 2], [3]]) == prediction_cache.chunks_key([[1, 2], [3]])
@@ -0,0 +1,40 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+transformers = pytest.importorskip("transformers")
+transformer = pytest.importorskip("ml.transformer")
+
+
+@pytest.fixture
+def positional(monkeypatch):
+    monkeypatch.setattr(transformer, "sampling", "positional")
+    monkeypatch.setattr(transformer, "sample_windows", 3)
+    monkeypatch.setattr(transformer, "sample_chars", 2048)
+
+
+class TestPositionalSampling:
+    def test_only_long_texts_are_sampled(self, positional):
+        needs_sampling = getattr(transformer, "__needs_sampling")
+        assert not needs_sampling("x" * (3 * 2048))
+        assert needs_sampling("x" * (3 * 2048 + 1))
+
+    def test_windows_cover_start_middle_and_end(self, positional):
+        text = "start " + "a" * 50000 + " middle " + "b" * 50000 + " end"
+        windows = getattr(transformer, "__sample_windows")(text)
+        assert len(windows) == 3 and all(len(window) == 2048 for window in windows)
+        assert windows[0].startswith("start ")
+        assert " middle " in windows[1]
+        assert windows[2].endswith(" end")
+
+    def test_token_count_is_bounded_by_windows(self, positional, monkeypatch):
+        try:
+            tokenizer = transformers.DistilBertTokenizerFast.from_pretrained("distilbert-base-uncased")
+        except Exception as e:
+            pytest.skip(f"distilbert-base-uncased not available: {e}")
+        monkeypatch.setattr(transformer, "tokenizer", tokenizer, raising=False)
+        text = '{"key": "value", "list": [1, 2, 3]}\n' * 50000
+        chunks = getattr(transformer, "__chunk_text")(text)
+        assert len(chunks) == 3
+        assert all(len(chunk) <= 512 for chunk in chunks)
@@ -0,0 +1,27 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import random
+import pytest
+from ml.token_batching import TokenBudgetBatchSampler, padding_report
+
+
+class TestTokenBudgetBatchSampler:
+    def test_batches_respect_budget_and_cover_every_sample_once_per_epoch(self):
+        rng = random.Random(1)
+        lengths = [rng.randint(10, 512) for _ in range(1000)]
+        sampler = TokenBudgetBatchSampler(lengths, max_tokens=2048, bucket_size=256)
+        for _ in range(2):
+            batches = list(sampler)
+            assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+            assert all(max(lengths[i] for i in batch) * len(batch) <= 2048 for batch in batches)
+
+    def test_short_samples_pad_far_less_than_fixed_length(self):
+        lengths = [random.Random(i).randint(20, 120) for i in range(500)]
+        report = padding_report(lengths, TokenBudgetBatchSampler(lengths, max_tokens=4096))
+        assert report["dynamic_efficiency"] > 0.8 > report["fixed_efficiency"]
+        assert report["expected_speedup"] > 3
+
+    def test_budget_smaller_than_longest_sample_is_rejected(self):
+        with pytest.raises(ValueError):
+            TokenBudgetBatchSampler([10, 600], max_tokens=512)